@@ -0,0 +1,188 @@
+import csv
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from sagpy.utils import *
+from sagpy.jobs import JobTable
+from sagpy.job_file import SUFFIX, load_job_file
+from sagpy.sag_algorithms import ALGORITHMS
+from sagpy.sag_template import DeadlineMiss
+
+SUMMARY_COLUMNS = [
+    "jobs",
+    "pred",
+    "cores",
+    "status",
+    "num_jobs",
+    "max_WCRT",
+    "seconds",
+    "details",
+]
+RESPONSE_TIME_COLUMNS = ["jobs", "pred", "cores", "job", "BCRT", "WCRT"]
+
+
+def get_batch_inputs(path: str) -> list[tuple[str, str]]:
+    """
+    Returns the (jobs csv, pred csv) pairs to analyze, where the pred csv is "" if there
+    are no precedence constraints. path is either:
+
+    - a directory: every csv in it is a job set, except the ones named <name>_pred.csv,
+      which hold the precedence constraints of the job set <name>.csv. Binary job files
+      (see job_file) in it are job sets as well.
+    - a manifest csv: each row has the path to a job set and, optionally, the path
+      to its precedence constraints. Relative paths are relative to the manifest.
+    """
+    if os.path.isdir(path):
+        files = sorted(f for f in os.listdir(path) if f.endswith((".csv", SUFFIX)))
+        inputs = []
+        for file in files:
+            if file.endswith(SUFFIX):
+                inputs.append((os.path.join(path, file), ""))
+                continue
+            if file.endswith("_pred.csv"):
+                continue
+
+            pred_file = f"{file[:-4]}_pred.csv"
+            pred_path = os.path.join(path, pred_file) if pred_file in files else ""
+            inputs.append((os.path.join(path, file), pred_path))
+
+        return inputs
+
+    if not os.path.isfile(path):
+        raise ValueError(f"{path} is neither a directory nor a manifest file!")
+
+    base_dir = os.path.dirname(path)
+    inputs = []
+    with open(path, "r") as manifest:
+        for index, row in enumerate(csv.reader(manifest)):
+            row = [value.strip() for value in row if value.strip() != ""]
+            if len(row) == 0:
+                continue
+            if len(row) > 2:
+                raise ValueError(
+                    f"Row {index} of the manifest at {path} has more than 2 columns!"
+                )
+
+            paths = [os.path.join(base_dir, os.path.expanduser(p)) for p in row]
+            inputs.append((paths[0], paths[1] if len(paths) == 2 else ""))
+
+    return inputs
+
+
+def read_inputs(jobs_path: str, pred_path: str = "") -> tuple[set, JobTable, dict]:
+    """
+    Reads a job set (in either csv format, or a binary job file with its precedence
+    constraints) and its precedence constraints.
+    Returns J, JDICT (as a JobTable) and PRED as expected by the SAG algorithms.
+    """
+    if jobs_path.endswith(SUFFIX):
+        # Only the jobs with predecessors are in PRED, which is enough for the algorithms
+        JDICT, PRED = load_job_file(jobs_path)
+    else:
+        JDICT = read_job_table(jobs_path)
+        PRED = {j: set() for j in JDICT.keys()}
+
+    if pred_path != "":
+        PRED.update(read_pred(pred_path))
+
+    return set(JDICT.keys()), JDICT, PRED
+
+
+def analyze(run: tuple) -> dict:
+    """
+    Analyzes one job set on one number of cores, without keeping the SAG.
+    run is (algorithm name, jobs csv, pred csv, cores, options of the algorithm).
+
+    Returns a row of the summary table, with the response times under "BR" and "WR".
+    Errors are reported in the row instead of raised, so that one bad input does not
+    stop the whole batch.
+    """
+    algorithm, jobs_path, pred_path, cores, options = run
+    stop_on_deadline_miss = options.get("stop_on_deadline_miss", False)
+    row = {"jobs": jobs_path, "pred": pred_path, "cores": cores, "BR": {}, "WR": {}}
+    start = time.perf_counter()
+
+    try:
+        J, JDICT, PRED = read_inputs(jobs_path, pred_path)
+        row["num_jobs"] = len(J)
+        _, row["BR"], row["WR"] = ALGORITHMS[algorithm](
+            J,
+            cores,
+            JDICT,
+            PRED,
+            logging.Logger("SAGPY", logging.CRITICAL),
+            keep_graph=False,
+            **options,
+        )
+        row["status"] = "schedulable" if stop_on_deadline_miss else "done"
+        row["details"] = ""
+    except DeadlineMiss as miss:
+        row["BR"], row["WR"] = miss.BR, miss.WR
+        row["status"] = "deadline miss"
+        row["details"] = (
+            f"{miss.job} late by {miss.lateness} after {' -> '.join(miss.path)}"
+        )
+    except Exception as error:
+        row["status"] = "error"
+        row["details"] = f"{type(error).__name__}: {error}"
+
+    row["seconds"] = round(time.perf_counter() - start, 3)
+    row["max_WCRT"] = max(row["WR"].values(), default="")
+
+    return row
+
+
+def run_batch(
+    inputs: list[tuple[str, str]],
+    algorithm: str,
+    cores: list[int],
+    workers: int = 1,
+    stop_on_deadline_miss: bool = False,
+    **options,
+) -> list[dict]:
+    """
+    Analyzes every job set of inputs (see get_batch_inputs) for every number of cores,
+    on a pool of workers processes (or in this process if workers is 1).
+    The other options (e.g. prune_dominated or busy_windows) are passed to the algorithm.
+    Returns the rows of the results (see analyze), in the order of inputs and cores.
+    """
+    options["stop_on_deadline_miss"] = stop_on_deadline_miss
+    runs = [
+        (algorithm, jobs_path, pred_path, m, options)
+        for jobs_path, pred_path in inputs
+        for m in cores
+    ]
+
+    if workers == 1:
+        return [analyze(run) for run in runs]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(analyze, runs))
+
+
+def write_batch_results(results: list[dict], output_folder: str) -> tuple[str, str]:
+    """
+    Writes the aggregated results of a batch: a summary with one row per job set and
+    number of cores, and the response times of all jobs of all runs.
+    Returns the paths of both csv files.
+    """
+    summary_path = os.path.join(output_folder, "batch_summary.csv")
+    with open(summary_path, "w+", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(SUMMARY_COLUMNS)
+        for row in results:
+            writer.writerow([row.get(column, "") for column in SUMMARY_COLUMNS])
+
+    response_times_path = os.path.join(output_folder, "batch_response_times.csv")
+    with open(response_times_path, "w+", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(RESPONSE_TIME_COLUMNS)
+        for row in results:
+            for job, WR in row["WR"].items():
+                writer.writerow(
+                    [row["jobs"], row["pred"], row["cores"], job, row["BR"][job], WR]
+                )
+
+    return summary_path, response_times_path
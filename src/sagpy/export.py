@@ -0,0 +1,130 @@
+import json
+from html import escape
+
+
+def state_fields(state, job_names: list) -> dict:
+    """
+    Returns the attributes of a state as JSON-serializable values, with job IDs
+    instead of job indices.
+    """
+    fields = {
+        "A": [list(interval) for interval in state.A],
+        "X": sorted(job_names[x] for x, _, _ in state.XF),
+        "FTI": {job_names[x]: [EFT, LFT] for x, EFT, LFT in state.XF},
+    }
+    for name in ("PP", "PP2"):
+        if hasattr(state, name):
+            fields[name] = list(getattr(state, name))
+
+    return fields
+
+
+class SAGExporter:
+    """
+    Writes the states and edges of a SAG to a file while the SAG is being explored.
+
+    The SAG store (see sag_graph.ScheduleGraph) calls state() once for every state,
+    when it cannot change anymore, and then edge() for the edges into the states of
+    that level, so the file is only ever appended to.
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, "w")
+        self.file.write(self.header())
+
+    def header(self) -> str:
+        return ""
+
+    def footer(self) -> str:
+        return ""
+
+    def state(self, node_id: int, state, job_names: list):
+        raise NotImplementedError
+
+    def edge(self, parent: int, child: int, job: str):
+        raise NotImplementedError
+
+    def close(self):
+        if not self.file.closed:
+            self.file.write(self.footer())
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class JSONLinesExporter(SAGExporter):
+    """
+    One JSON object per line: {"state": id, "A": ..., "X": ..., "FTI": ..., ...} for each
+    state and {"edge": [parent, child], "job": job ID} for each edge.
+    """
+
+    def state(self, node_id: int, state, job_names: list):
+        record = {"state": node_id, **state_fields(state, job_names)}
+        self.file.write(json.dumps(record) + "\n")
+
+    def edge(self, parent: int, child: int, job: str):
+        self.file.write(json.dumps({"edge": [parent, child], "job": job}) + "\n")
+
+
+class DOTExporter(SAGExporter):
+    """
+    Graphviz DOT, with the attributes of each state (one "name: JSON value" per line)
+    as node label and the job as edge label.
+    """
+
+    def header(self) -> str:
+        return "digraph SAG {\n"
+
+    def footer(self) -> str:
+        return "}\n"
+
+    def state(self, node_id: int, state, job_names: list):
+        label = "\n".join(
+            f"{name}: {json.dumps(value)}"
+            for name, value in state_fields(state, job_names).items()
+        )
+        self.file.write(f"  {node_id} [label={json.dumps(label)}];\n")
+
+    def edge(self, parent: int, child: int, job: str):
+        self.file.write(f"  {parent} -> {child} [label={json.dumps(job)}];\n")
+
+
+class GraphMLExporter(SAGExporter):
+    """
+    GraphML, with the attributes of each state as a JSON string in its "state" data.
+    """
+
+    def header(self) -> str:
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+            '  <key id="state" for="node" attr.name="state" attr.type="string"/>\n'
+            '  <key id="job" for="edge" attr.name="job" attr.type="string"/>\n'
+            '  <graph id="SAG" edgedefault="directed">\n'
+        )
+
+    def footer(self) -> str:
+        return "  </graph>\n</graphml>\n"
+
+    def state(self, node_id: int, state, job_names: list):
+        fields = escape(json.dumps(state_fields(state, job_names)), quote=False)
+        self.file.write(
+            f'    <node id="n{node_id}"><data key="state">{fields}</data></node>\n'
+        )
+
+    def edge(self, parent: int, child: int, job: str):
+        self.file.write(
+            f'    <edge source="n{parent}" target="n{child}">'
+            f'<data key="job">{escape(job, quote=False)}</data></edge>\n'
+        )
+
+
+EXPORTERS = {
+    "jsonl": JSONLinesExporter,
+    "dot": DOTExporter,
+    "graphml": GraphMLExporter,
+}
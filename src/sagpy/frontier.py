@@ -0,0 +1,85 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+# Set in each worker process by _init_worker
+_expand = None
+_context = None
+
+
+def _init_worker(expand, context):
+    global _expand, _context
+    _expand = expand
+    _context = context
+
+
+def _expand_chunk(chunk: tuple) -> list:
+    BR, WR, entries = chunk
+    return [_expand(_context, BR, WR, *entry) for entry in entries]
+
+
+class FrontierExpander:
+    """
+    Expands the states of a SAG level, in this process or on a pool of worker processes.
+
+    expand(context, BR, WR, *entry) must be a module-level function that returns the
+    successors of one state without changing anything; the caller adds them to the
+    graph and updates BR/WR. context holds everything that does not change during the
+    exploration (e.g. the job table) and is sent to each worker once.
+
+    With one worker, the states are expanded lazily, one at a time, so each expansion
+    sees the BR/WR updates of the states before it, exactly like a serial exploration.
+    With more workers, all states of a level are expanded against a snapshot of BR/WR
+    taken at the start of the level, and the results are returned in the order of the
+    states, so the outcome does not depend on the number of workers or on scheduling.
+    BR/WR are only read for the predecessors of jobs, so without precedence constraints
+    both ways give the same SAG. For the same reason, the snapshot only holds BR/WR of
+    the predecessors, given as the indices in predecessors, and is empty without
+    precedence constraints.
+    """
+
+    # Chunks per worker and level, to balance the load without too much overhead
+    CHUNKS_PER_WORKER = 4
+    # Smaller levels are expanded in this process (still on a snapshot of BR/WR),
+    # since sending them to the workers takes longer than expanding them
+    MIN_PARALLEL_STATES = 64
+
+    def __init__(self, expand, context, workers: int = 1, predecessors: list = ()):
+        self.expand = expand
+        self.context = context
+        self.workers = workers
+        self.predecessors = predecessors
+        self.pool = None
+        if workers > 1:
+            self.pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(expand, context),
+            )
+
+    def map(self, entries: list, BR: list, WR: list):
+        """
+        Returns an iterable over the results of expand for each entry, in order.
+        """
+        if self.pool is None:
+            return (self.expand(self.context, BR, WR, *entry) for entry in entries)
+
+        BR = {y: BR[y] for y in self.predecessors}
+        WR = {y: WR[y] for y in self.predecessors}
+        if len(entries) < max(self.workers, self.MIN_PARALLEL_STATES):
+            return [self.expand(self.context, BR, WR, *entry) for entry in entries]
+
+        size = -(-len(entries) // (self.workers * self.CHUNKS_PER_WORKER))
+        chunks = [(BR, WR, entries[k : k + size]) for k in range(0, len(entries), size)]
+
+        return chain.from_iterable(self.pool.map(_expand_chunk, chunks))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
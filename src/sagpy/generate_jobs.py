@@ -1,68 +1,168 @@
 import csv
+import heapq
+import math
 import argparse
+from array import array
 
+from sagpy.jobs import JobTable, NO_DEADLINE
 
-def generate_jobs(
-    input_path: str, output_path: str, latest_release=10, allow_instant_start=False
-):
+
+def read_tasks(input_path: str) -> list[tuple[str, int, int, int, int]]:
     """
-    Generates a csv with jobs information from a given csv file with task information.
+    Reads a csv with one task per row: TaskName, Period, StartJitter, Cmin, Cmax.
+    """
+    tasks = []
+    with open(input_path, "r") as fd:
+        for task in csv.reader(fd, delimiter=","):
+            if len(task) != 5:
+                raise ValueError("Each row must have exactly 5 values!")
 
-    Format input: TaskName, Period, StartJitter, Cmin, Cmax
-    Format output: JobName, r_min r_max, C_min, C_max, p
-    The task priority is the index of the row in the csv,
-        i.e. the task's priority is inherent to its position in the csv.
+            task_name, T, jitter, C_min, C_max = task
+            tasks.append(
+                (task_name.strip(), int(T), int(jitter), int(C_min), int(C_max))
+            )
+
+    return tasks
+
+
+def hyperperiod(tasks: list) -> int:
+    """
+    Returns the least common multiple of the periods of the tasks.
+    """
+    return math.lcm(*(T for _, T, _, _, _ in tasks))
+
+
+def expand_tasks(tasks: list, latest_release: int = None, allow_instant_start=False):
     """
-    fd = open(input_path, "r")
-    csv_file = csv.reader(fd, delimiter=",")
+    Yields (task, first release, number of jobs, priority of the first job) for each
+    task (see read_tasks) that releases jobs up to latest_release, or in one hyperperiod
+    H if latest_release is None, i.e. H/T jobs per task with period T.
 
+    The first job of a task is released at 0 if allow_instant_start, or else after one
+    period. The task priority is the index of the row in the csv, and the jobs of a task
+    get consecutive priorities.
+    """
     allow_instant_start = int(allow_instant_start)
+    if latest_release is None:
+        latest_release = hyperperiod(tasks) - allow_instant_start
+
     priority = 1
-    jobs = []
+    for task in tasks:
+        T = task[1]
+        first_release = T * (1 - allow_instant_start)
+        if latest_release < first_release:
+            continue
+
+        n = (latest_release - first_release) // T + 1
+        yield task, first_release, n, priority
+        priority += n
+
+
+def generate_job_table(
+    input_path: str, latest_release: int = None, allow_instant_start=False
+) -> JobTable:
+    """
+    Generates the jobs of the tasks in a csv (see read_tasks and expand_tasks) directly
+    as a JobTable (without deadlines).
+    Each task is expanded at once: its release times are ranges and the other columns
+    are repeated values, so only the job names are built one by one.
+    """
+    tasks = read_tasks(input_path)
+    jobs = JobTable()
+    for task, first_release, n, priority in expand_tasks(
+        tasks, latest_release, allow_instant_start
+    ):
+        task_name, T, jitter, C_min, C_max = task
+        names = list(map(f"J{task_name}_{{}}".format, range(1, n + 1)))
+        columns = {
+            "r_min": range(first_release, first_release + n * T, T),
+            "r_max": range(first_release + jitter, first_release + jitter + n * T, T),
+            "C_min": array("q", [C_min]) * n,
+            "C_max": array("q", [C_max]) * n,
+            "d": array("q", [NO_DEADLINE]) * n,
+            "p": range(priority, priority + n),
+        }
+        jobs.extend(names, columns)
 
-    for task in csv_file:
-        if len(task) != 5:
-            raise ValueError("Each row must have exactly 5 values!")
+    return jobs
 
-        if type(task[0]) == int:
-            raise ValueError("The name of a task must be an integer!")
 
+def release_ordered_jobs(
+    input_path: str, latest_release: int = None, allow_instant_start=False
+):
+    """
+    Yields the jobs of generate_job_table one at a time, in order of r_min (and then of
+    priority), as (name, r_min, r_max, C_min, C_max, d, p) tuples for jobs.JobFeed.
+    Only the next job of every task is in memory.
+    """
+    tasks = read_tasks(input_path)
+
+    def task_jobs(task, first_release, n, priority):
         task_name, T, jitter, C_min, C_max = task
-        T, jitter, C_min, C_max = int(T), int(jitter), int(C_min), int(C_max)
-        job_counter = 1
-        r_min = T * (job_counter - allow_instant_start)
+        for k in range(n):
+            r_min = first_release + k * T
+            yield (
+                f"J{task_name}_{k + 1}",
+                r_min,
+                r_min + jitter,
+                C_min,
+                C_max,
+                NO_DEADLINE,
+                priority + k,
+            )
+
+    return heapq.merge(
+        *(
+            task_jobs(*expansion)
+            for expansion in expand_tasks(tasks, latest_release, allow_instant_start)
+        ),
+        key=lambda job: (job[1], job[6]),
+    )
 
-        while r_min <= latest_release:
-            job_name = f"J{task_name}_{job_counter}"
-            r_max = r_min + jitter
-            job = (job_name, r_min, r_max, C_min, C_max, priority)
-            jobs.append(job)
 
-            job_counter += 1
-            priority += 1
-            r_min = T * (job_counter - allow_instant_start)
+def write_jobs_csv(jobs: JobTable, output_path: str):
+    """
+    Writes a JobTable as a job csv without header: JobName, r_min, r_max, C_min, C_max, p
+    """
+    with open(output_path, "w+", newline="") as fd_write:
+        writer = csv.writer(fd_write)
+        writer.writerows(
+            zip(jobs.names, jobs.r_min, jobs.r_max, jobs.C_min, jobs.C_max, jobs.p)
+        )
 
-    fd_write = open(output_path, "w+")
-    writer = csv.writer(fd_write)
 
-    for job in jobs:
-        writer.writerow(job)
+def generate_jobs(
+    input_path: str, output_path: str, latest_release=10, allow_instant_start=False
+):
+    """
+    Generates a csv with jobs information from a given csv file with task information.
 
-    fd.close()
-    fd_write.close()
+    Format input: TaskName, Period, StartJitter, Cmin, Cmax
+    Format output: JobName, r_min r_max, C_min, C_max, p
+    The task priority is the index of the row in the csv,
+        i.e. the task's priority is inherent to its position in the csv.
+    """
+    jobs = generate_job_table(input_path, latest_release, allow_instant_start)
+    write_jobs_csv(jobs, output_path)
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("input_file")
     parser.add_argument("output_file")
-    parser.add_argument("latest_release_time")
+    parser.add_argument(
+        "latest_release_time",
+        help="By default, the jobs of one hyperperiod are generated.",
+        nargs="?",
+        default=None,
+        type=int,
+    )
     parser.add_argument("--allow-instant-start", action="store_true")
     args = parser.parse_args()
 
     generate_jobs(
         args.input_file,
         args.output_file,
-        int(args.latest_release_time),
+        args.latest_release_time,
         args.allow_instant_start,
     )
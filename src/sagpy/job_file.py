@@ -0,0 +1,124 @@
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+
+from sagpy.jobs import JobTable
+from sagpy.utils import read_job_table, read_pred
+
+SUFFIX = ".sagjobs"
+MAGIC = b"SAGJOBS1"
+# Magic, number of jobs, number of precedence constraints, length of the job names
+HEADER = struct.Struct("<8sQQQ")
+
+
+def write_job_file(path: str, jobs: JobTable, PRED: dict = None):
+    """
+    Writes a job set and its precedence constraints to a binary job file:
+
+    - the header: magic, number of jobs, number of precedence constraints (edges) and
+      the length of the job names, as unsigned 64-bit little-endian integers
+    - the columns of the JobTable (r_min, r_max, C_min, C_max, d, p), one after the other,
+      as signed 64-bit little-endian integers
+    - the edges as two columns of job indices (predecessor, then successor)
+    - the job IDs, encoded as UTF-8 and separated by newlines
+
+    All integers are 8-byte aligned, so that load_job_file can map them without copying.
+    """
+    PRED = PRED or dict()
+    predecessors = array("q")
+    successors = array("q")
+    for Ji, preds in PRED.items():
+        if Ji not in jobs.index:
+            continue
+
+        for Jy in sorted(preds):
+            if Jy not in jobs.index:
+                raise ValueError(f"Job {Ji} depends on {Jy}, which is not a job!")
+            predecessors.append(jobs.index[Jy])
+            successors.append(jobs.index[Ji])
+
+    names = "\n".join(jobs.names).encode("utf-8")
+    columns = [array("q", getattr(jobs, column)) for column in JobTable.COLUMNS]
+    if sys.byteorder != "little":
+        for column in columns + [predecessors, successors]:
+            column.byteswap()
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(jobs), len(predecessors), len(names)))
+        for column in columns + [predecessors, successors]:
+            column.tofile(file)
+        file.write(names)
+
+
+def load_job_file(path: str) -> tuple[JobTable, dict]:
+    """
+    Loads a binary job file written by write_job_file. Returns the JobTable and PRED,
+    which (like utils.read_pred) only has the jobs with predecessors.
+
+    The file is memory-mapped and the columns of the JobTable are read-only views on it,
+    so the job parameters are neither parsed nor copied (on little-endian machines);
+    only the job IDs are decoded. The mapping stays open as long as the table is used.
+    """
+    with open(path, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(buffer) < HEADER.size:
+        raise ValueError(f"{path} is not a job file!")
+    magic, num_jobs, num_edges, names_length = HEADER.unpack_from(buffer)
+    end = HEADER.size + 8 * (6 * num_jobs + 2 * num_edges) + names_length
+    if magic != MAGIC or len(buffer) != end:
+        raise ValueError(f"{path} is not a job file or is truncated!")
+
+    view = memoryview(buffer)
+    offset = HEADER.size
+
+    def column(length: int):
+        nonlocal offset
+        values = view[offset : offset + 8 * length].cast("q")
+        offset += 8 * length
+        if sys.byteorder != "little":
+            values = array("q", values)
+            values.byteswap()
+        return values
+
+    jobs = JobTable()
+    for name in JobTable.COLUMNS:
+        setattr(jobs, name, column(num_jobs))
+    predecessors = column(num_edges)
+    successors = column(num_edges)
+
+    names = bytes(view[offset:]).decode("utf-8")
+    jobs.names = names.split("\n") if num_jobs > 0 else []
+    jobs.index = dict(zip(jobs.names, range(num_jobs)))
+
+    PRED = dict()
+    for y, i in zip(predecessors, successors):
+        PRED.setdefault(jobs.names[i], set()).add(jobs.names[y])
+
+    return jobs, PRED
+
+
+def convert_csv(jobs_path: str, output_path: str, pred_path: str = ""):
+    """
+    Converts a job set csv and, optionally, a predecessor csv (in any format read by
+    utils.read_job_table and utils.read_pred) to a binary job file.
+    """
+    jobs = read_job_table(jobs_path)
+    PRED = read_pred(pred_path) if pred_path != "" else dict()
+    write_job_file(output_path, jobs, PRED)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=f"Converts a job set csv to a binary job file ({SUFFIX}), which loads faster."
+    )
+    parser.add_argument("jobs_csv")
+    parser.add_argument("output_file")
+    parser.add_argument(
+        "--pred", help="CSV with the precedence constraints.", default=""
+    )
+    args = parser.parse_args()
+
+    convert_csv(args.jobs_csv, args.output_file, args.pred)
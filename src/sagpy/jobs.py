@@ -0,0 +1,462 @@
+import bisect
+from array import array
+
+NO_DEADLINE = 2**63 - 1  # Deadline of the jobs read from a csv without deadlines
+
+
+class JobTable:
+    """
+    Compact table of jobs, where every job has a dense integer index.
+
+    Each job parameter is stored in its own array of 64-bit integers (a column),
+    indexed by the job index, instead of a dictionary per job. The columns of a table
+    loaded from a binary job file (see job_file.load_job_file) are read-only.
+    For compatibility, the table can still be read like the dictionaries returned by
+    utils.get_job_dict/get_job_dict2, e.g. JDICT["J1_1"]["r_min"].
+
+    Attributes:
+        names   The job ID of each index
+        index   The index of each job ID
+        r_min   Min release time
+        r_max   Max release time
+        C_min   Best-case execution time (BCET)
+        C_max   Worst-case execution time (WCET)
+        d       Deadline (NO_DEADLINE if unknown)
+        p       Priority
+    """
+
+    COLUMNS = ("r_min", "r_max", "C_min", "C_max", "d", "p")
+
+    def __init__(self):
+        self.names = []
+        self.index = dict()
+        self.r_min = array("q")
+        self.r_max = array("q")
+        self.C_min = array("q")
+        self.C_max = array("q")
+        self.d = array("q")
+        self.p = array("q")
+
+    def append(
+        self,
+        name: str,
+        r_min: int,
+        r_max: int,
+        C_min: int,
+        C_max: int,
+        d: int = NO_DEADLINE,
+        p: int = 0,
+    ) -> int:
+        """
+        Adds a job at the end of the table and returns its index.
+        """
+        if name in self.index:
+            raise ValueError(f"Job {name} is already in the job table!")
+
+        i = len(self.names)
+        self.names.append(name)
+        self.index[name] = i
+        self.r_min.append(r_min)
+        self.r_max.append(r_max)
+        self.C_min.append(C_min)
+        self.C_max.append(C_max)
+        self.d.append(d)
+        self.p.append(p)
+
+        return i
+
+    def extend(self, names: list, columns: dict):
+        """
+        Adds many jobs at the end of the table at once, e.g. a chunk of a csv file.
+        columns has an iterable of integers per column of COLUMNS, in the order of names.
+        """
+        start = len(self.names)
+        self.names.extend(names)
+        self.index.update(zip(names, range(start, len(self.names))))
+        if len(self.index) != len(self.names):
+            duplicate = next(n for i, n in enumerate(self.names) if self.index[n] != i)
+            raise ValueError(f"Job {duplicate} is already in the job table!")
+
+        for column in self.COLUMNS:
+            getattr(self, column).extend(columns[column])
+            if len(getattr(self, column)) != len(self.names):
+                raise ValueError(
+                    f"Column {column} does not have a value for every job!"
+                )
+
+    def retire(self, count: int):
+        """
+        Removes the first count jobs, e.g. the jobs of a JobFeed that every state has
+        dispatched. The other jobs move count indices down.
+        """
+        del self.names[:count]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        for column in self.COLUMNS:
+            del getattr(self, column)[:count]
+
+    @classmethod
+    def from_dict(cls, JDICT: dict, J=None):
+        """
+        Builds a table from a dictionary of jobs as returned by utils.get_job_dict/get_job_dict2.
+        If J is given, only the jobs in J are added. The order of JDICT is kept.
+        """
+        table = cls()
+        for Ji, values in JDICT.items():
+            if J is None or Ji in J:
+                table.append(
+                    Ji,
+                    values["r_min"],
+                    values["r_max"],
+                    values["C_min"],
+                    values["C_max"],
+                    values.get("d", NO_DEADLINE),
+                    values["p"],
+                )
+
+        return table
+
+    def select(self, indices):
+        """
+        Returns a new table with the jobs at the given indices, in that order.
+        """
+        table = JobTable()
+        table.extend(
+            [self.names[i] for i in indices],
+            {
+                column: [getattr(self, column)[i] for i in indices]
+                for column in self.COLUMNS
+            },
+        )
+        return table
+
+    def __getstate__(self) -> dict:
+        # Columns that are views on a memory-mapped job file (see job_file) are copied
+        state = dict(self.__dict__)
+        for column in self.COLUMNS:
+            if not isinstance(state[column], array):
+                state[column] = array("q", state[column])
+        return state
+
+    def row(self, i: int) -> dict:
+        """
+        Returns the parameters of the job with index i as a dictionary.
+        """
+        return {column: getattr(self, column)[i] for column in self.COLUMNS}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __getitem__(self, name) -> dict:
+        return self.row(self.index[name])
+
+    def keys(self):
+        return self.index.keys()
+
+    def items(self):
+        return ((name, self.row(i)) for i, name in enumerate(self.names))
+
+
+def as_job_table(J: set, JDICT) -> JobTable:
+    """
+    Returns the jobs of J as a JobTable.
+    JDICT is either a JobTable or a dictionary as returned by utils.get_job_dict/get_job_dict2.
+    """
+    if isinstance(JDICT, JobTable) and len(J) == len(JDICT):
+        return JDICT
+
+    return JobTable.from_dict(JDICT, J)
+
+
+class JobFeed:
+    """
+    Adds the jobs of a release-ordered source to a JobTable when they are needed,
+    instead of all at once.
+
+    source is an iterable of (name, r_min, r_max, C_min, C_max, d, p) tuples sorted by
+    r_min, e.g. generate_jobs.release_ordered_jobs or utils.iter_jobs. The jobs get the
+    next indices of the table, so the jobs that are already in it stay where they are.
+    """
+
+    def __init__(self, jobs: JobTable, source):
+        self.jobs = jobs
+        self.source = iter(source)
+        self.next_job = next(self.source, None)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.next_job is None
+
+    @property
+    def next_release(self):
+        """
+        The r_min of the next job of the source, or None if there is none.
+        """
+        return None if self.next_job is None else self.next_job[1]
+
+    def admit_until(self, t: int) -> int:
+        """
+        Adds the jobs with r_min <= t to the table.
+        Returns the bitmask of the indices of the added jobs.
+        """
+        start = len(self.jobs)
+        while self.next_job is not None and self.next_job[1] <= t:
+            self.jobs.append(*self.next_job)
+            job = next(self.source, None)
+            if job is not None and job[1] < self.next_job[1]:
+                raise ValueError(
+                    f"The jobs are not sorted by r_min: {job[0]} is released before {self.next_job[0]}!"
+                )
+            self.next_job = job
+
+        return ((1 << len(self.jobs)) - 1) ^ ((1 << start) - 1)
+
+
+def iter_bits(mask: int):
+    """
+    Yields the indices of the bits that are set in mask, from the lowest to the highest.
+    """
+    while mask:
+        lowest_bit = mask & -mask
+        yield lowest_bit.bit_length() - 1
+        mask ^= lowest_bit
+
+
+def split_busy_windows(jobs: JobTable, preds: list) -> list[list[int]]:
+    """
+    Splits the jobs into busy windows that can be analyzed separately: all jobs of a
+    window certainly finish before any job of the next window can be released.
+    preds has the set of (indices of) the predecessors of each job, as in
+    PrecedenceIndex.preds.
+    Returns the indices of the jobs of each window, in order of index.
+
+    Going through the jobs in order of r_min, a window ends before job j if
+    f <= r_min(j), where f = max(f, r_max) + C_max over the jobs of the window.
+    Without precedence constraints, the last job of a work-conserving schedule (on any
+    number of cores) finishes at most the total work of the jobs released since the last
+    instant all cores were idle after that instant, and f bounds this for every such
+    instant. A job that waits for its predecessors can leave cores idle, so f is no bound
+    for a window with precedence constraints: such a window is never ended.
+    """
+    constrained = [len(p) > 0 for p in preds]
+    for i in range(len(jobs)):
+        for y in preds[i]:
+            constrained[y] = True
+
+    windows = []
+    window = []
+    f = None
+    has_precedence = False
+    for i in sorted(range(len(jobs)), key=jobs.r_min.__getitem__):
+        if f is not None and f <= jobs.r_min[i] and not has_precedence:
+            windows.append(sorted(window))
+            window = []
+            f = None
+
+        window.append(i)
+        f = jobs.r_max[i] if f is None else max(f, jobs.r_max[i])
+        f += jobs.C_max[i]
+        has_precedence = has_precedence or constrained[i]
+
+    if len(window) > 0:
+        windows.append(sorted(window))
+
+    return windows
+
+
+class PrecedenceIndex:
+    """
+    The precedence constraints of a JobTable, indexed by job index.
+
+    PRED is the dictionary of predecessors returned by utils.get_pred/get_pred2.
+    A set of ready jobs (i.e. not dispatched and with all predecessors dispatched)
+    is kept as a bitmask, together with a countdown of the remaining predecessors
+    of the jobs that have some, but not all, of their predecessors dispatched.
+
+    Attributes:
+        preds       For each index, the set of indices of the predecessors of the job
+        successors  For each index, the tuple of indices of the jobs that depend on it
+        in_degree   For each index, the number of predecessors of the job
+    """
+
+    def __init__(self, jobs: JobTable, PRED: dict):
+        self.preds = [frozenset() for i in range(len(jobs))]
+        successors = [[] for i in range(len(jobs))]
+
+        for Ji, predecessors in PRED.items():
+            if Ji not in jobs.index:
+                continue
+
+            i = jobs.index[Ji]
+            for Jy in predecessors:
+                if Jy not in jobs.index:
+                    raise ValueError(f"Job {Ji} depends on {Jy}, which is not a job!")
+
+            self.preds[i] = frozenset(jobs.index[Jy] for Jy in predecessors)
+            for y in self.preds[i]:
+                successors[y].append(i)
+
+        self.successors = [tuple(succ) for succ in successors]
+        self.in_degree = [len(preds) for preds in self.preds]
+
+    def add_jobs(self, count: int):
+        """
+        Adds count jobs without precedence constraints at the end, e.g. the jobs that
+        a JobFeed adds to the table.
+        """
+        self.preds.extend([frozenset()] * count)
+        self.successors.extend([()] * count)
+        self.in_degree.extend([0] * count)
+
+    def retire(self, count: int):
+        """
+        Removes the first count jobs, which must not have precedence constraints (like
+        the jobs of add_jobs). The other jobs move count indices down.
+        """
+        del self.preds[:count]
+        del self.successors[:count]
+        del self.in_degree[:count]
+
+    def initial_ready(self) -> tuple[int, dict]:
+        """
+        Returns the bitmask of the jobs without predecessors and an empty countdown.
+        """
+        ready = 0
+        for i, degree in enumerate(self.in_degree):
+            if degree == 0:
+                ready |= 1 << i
+
+        return ready, dict()
+
+    def after_dispatch(self, ready: int, waiting: dict, i: int) -> tuple[int, dict]:
+        """
+        Derives the ready jobs and the countdown after job i is dispatched, from the ready
+        jobs and the countdown before its dispatch. Only the successors of job i are
+        visited; the countdown is copied only if job i has successors.
+        """
+        ready &= ~(1 << i)
+        if len(self.successors[i]) == 0:
+            return ready, waiting
+
+        waiting = dict(waiting)
+        for s in self.successors[i]:
+            remaining = waiting.pop(s, self.in_degree[s]) - 1
+            if remaining == 0:
+                ready |= 1 << s
+            else:
+                waiting[s] = remaining
+
+        return ready, waiting
+
+
+class ReleaseIndex:
+    """
+    The jobs of a JobTable sorted by min and by max release time.
+
+    A cursor into each order, kept per state, points at the first job that is not
+    dispatched yet, so that scans for the ready jobs start there instead of at the first
+    job of the table. Jobs are dispatched roughly in release order, hence the jobs
+    between the cursor and the current time are few compared to all pending jobs.
+
+    Attributes:
+        order   For "r_min" and "r_max", the job indices sorted by that release time
+        times   For "r_min" and "r_max", the sorted release times (for bisection)
+    """
+
+    def __init__(self, jobs: JobTable):
+        self.order = dict()
+        self.times = dict()
+
+        for key in ("r_min", "r_max"):
+            column = getattr(jobs, key)
+            self.order[key] = sorted(range(len(jobs)), key=column.__getitem__)
+            self.times[key] = [column[j] for j in self.order[key]]
+
+    def skip_dispatched(self, cursors: tuple[int, int], dispatched: int) -> tuple:
+        """
+        Moves the (r_min, r_max) cursors past the jobs that are dispatched.
+        """
+        new_cursors = []
+        for key, cursor in zip(("r_min", "r_max"), cursors):
+            order = self.order[key]
+            while cursor < len(order) and dispatched >> order[cursor] & 1:
+                cursor += 1
+            new_cursors.append(cursor)
+
+        return tuple(new_cursors)
+
+    def ready_released_by(self, key: str, t: int, cursor: int, ready: int) -> set:
+        """
+        Returns the ready jobs whose key ("r_min" or "r_max") is at most t.
+        """
+        order = self.order[key]
+        end = bisect.bisect_right(self.times[key], t, lo=cursor)
+
+        return set([j for j in order[cursor:end] if ready >> j & 1])
+
+    def min_ready(self, key: str, cursor: int, ready: int, exclude: int = -1):
+        """
+        Returns the smallest key ("r_min" or "r_max") of the ready jobs other than job
+        exclude, or None if there is no such job.
+        """
+        order = self.order[key]
+        for position in range(cursor, len(order)):
+            j = order[position]
+            if j != exclude and ready >> j & 1:
+                return self.times[key][position]
+
+        return None
+
+
+class PriorityIndex:
+    """
+    A set of jobs sorted by priority, with the prefix minima of R_max over that order.
+
+    For a candidate Ji, t_high is the minimum of th(Jz) over the jobs Jz of the set with a
+    higher priority than Ji (i.e. a smaller p), and t_wc is based on the minimum of R_max
+    over the whole set. th(Jz) equals R_max(Jz) unless Jz shares a predecessor with Ji,
+    so both are answered from the prefix minima of R_max after one pass over the set.
+    Only when a higher-priority job with predecessors exists and Ji has predecessors,
+    th is evaluated for the higher-priority jobs one by one.
+    """
+
+    def __init__(self, job_set, p, preds: list, R_max):
+        self.jobs = sorted(job_set, key=p.__getitem__)
+        self.priorities = [p[z] for z in self.jobs]
+        self.prefix_min = []
+        # Whether one of the jobs up to that position has predecessors
+        self.prefix_has_preds = []
+
+        current_min = None
+        has_preds = False
+        for z in self.jobs:
+            bound = R_max(z)
+            current_min = bound if current_min is None else min(current_min, bound)
+            has_preds = has_preds or len(preds[z]) > 0
+            self.prefix_min.append(current_min)
+            self.prefix_has_preds.append(has_preds)
+
+    def min_R_max(self, default):
+        """
+        Returns the minimum of R_max over the set, or default if the set is empty.
+        """
+        return self.prefix_min[-1] if len(self.jobs) > 0 else default
+
+    def t_high(self, p_i: int, preds_i: frozenset, th, default):
+        """
+        Returns the minimum of th over the jobs with a priority higher than p_i,
+        or default if there is no such job.
+        """
+        k = bisect.bisect_left(self.priorities, p_i)
+        if k == 0:
+            return default
+
+        if len(preds_i) == 0 or not self.prefix_has_preds[k - 1]:
+            return self.prefix_min[k - 1]
+
+        return min([th(z) for z in self.jobs[:k]])
@@ -1,26 +1,59 @@
-import os
+import pkgutil
 import importlib
 import inspect
+from collections.abc import Mapping
 from typing import Callable
 
-ALGORITHMS = {}
 
-
-def register_algorithms():
+class AlgorithmRegistry(Mapping):
     """
-    Automatically load and register all SAG algorithm functions from modules in this directory.
+    The SAG algorithms by name, where the name is the module (in this directory) that
+    defines the algorithm. The modules are only listed when the registry is created and
+    each one is imported the first time that its algorithm is used, so that e.g. the
+    CLI does not pay for importing all algorithms and their dependencies.
     """
 
-    algorithm_dir = os.path.dirname(__file__)
-    for filename in os.listdir(algorithm_dir):
-        if filename.endswith(".py") and filename != "__init__.py":
-            module_name = filename[:-3]  # Remove ".py"
-            module = importlib.import_module(f"sagpy.sag_algorithms.{module_name}")
+    def __init__(self):
+        self.modules = []
+        self.algorithms = dict()
+
+    def __getitem__(self, name: str) -> Callable:
+        if name not in self.algorithms:
+            if name not in self.modules:
+                raise KeyError(name)
+
+            module = importlib.import_module(f"sagpy.sag_algorithms.{name}")
 
-            # Register all functions that have the sag_algorithm decorator applied
-            for name, func in inspect.getmembers(module, inspect.isfunction):
+            # Register the function that has the sag_algorithm decorator applied
+            for _, func in inspect.getmembers(module, inspect.isfunction):
                 if getattr(func, "_is_sag_algorithm", False):
-                    ALGORITHMS[module_name] = func
+                    self.algorithms[name] = func
+
+            if name not in self.algorithms:
+                raise KeyError(f"Module {name} does not define a SAG algorithm!")
+
+        return self.algorithms[name]
+
+    def __iter__(self):
+        return iter(self.modules)
+
+    def __len__(self) -> int:
+        return len(self.modules)
+
+
+ALGORITHMS = AlgorithmRegistry()
+
+
+def register_algorithms():
+    """
+    Register the names of all SAG algorithm modules in this directory, without importing them.
+    """
+
+    ALGORITHMS.modules = sorted(
+        module.name
+        for module in pkgutil.iter_modules(__path__)
+        if not module.ispkg and not module.name.startswith("_")
+    )
 
 
 register_algorithms()
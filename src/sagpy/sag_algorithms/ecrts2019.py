@@ -1,170 +1,662 @@
-import networkx as nx
-import random
 import logging
-from sagpy.sag_template import sag_algorithm
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+from sagpy.sag_template import sag_algorithm, DeadlineMiss
+from sagpy.sag_graph import (
+    ScheduleGraph,
+    add_or_merge_state,
+    add_or_prune_state,
+    unwind_path,
+)
+from sagpy.frontier import FrontierExpander
+from sagpy.jobs import (
+    JobTable,
+    JobFeed,
+    as_job_table,
+    PrecedenceIndex,
+    PriorityIndex,
+    iter_bits,
+    split_busy_windows,
+)
+
+if TYPE_CHECKING:
+    import networkx as nx
 
 
-######## Utility functions #######
-def get_rand_node_id():
+class State:
     """
-    Acts like a hash function for node IDs.
-    It just spits random integers between 10^6 to 10^7 - 1.
+    A state in the Schedule Abstraction Graph.
+
+    States are hashable, so they must not be changed once created (merge and shift
+    return new states): two states are equal when all their attributes are equal, and
+    the hash is computed the first time it is needed.
+    They use __slots__ and plain tuples instead of a __dict__ per state.
+
+    Attributes:
+        A   Tuple of core availability intervals
+        XF  Tuple of (x, EFT, LFT) for each (index of a) job x that is being executed by
+            one of the cores, sorted by x, with its Finish Time Interval [EFT, LFT]
+            EFT = Earliest Finish Time
+            LFT = Latest Finish TIme
+        JP  Bitmask of the jobs dispatched on the path to this state (see sagpy.jobs.JobTable)
     """
 
-    n = 6
-    lower_bound = 10 ** (n - 1)
-    upper_bound = 10**n - 1
-    return random.randint(lower_bound, upper_bound)
+    __slots__ = ("A", "XF", "JP", "_hash")
 
+    def __init__(self, A: tuple, XF: tuple, JP: int = 0):
+        self.A = A
+        self.XF = XF
+        self.JP = JP
+
+    def _args(self) -> tuple:
+        """
+        Returns the arguments of __init__ that recreate this state.
+        """
+        return (self.A, self.XF, self.JP)
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash(self._args())
+            return self._hash
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+
+        return self._args() == other._args()
+
+    def __reduce__(self):
+        return (type(self), self._args())
+
+    def __setstate__(self, state: dict):
+        """
+        Restores a state pickled before states had __slots__ (i.e. from its __dict__,
+        with a set X and a dict FTI instead of XF).
+        """
+        state = {
+            name: tuple(value) if isinstance(value, list) else value
+            for name, value in state.items()
+        }
+        FTI = state.pop("FTI")
+        state["XF"] = tuple(sorted((x, *FTI[x]) for x in state.pop("X")))
+        self.__init__(**state)
 
-def shortestPathFromSourceToLeaf(G):
-    leaves = [node for node in G.nodes if G.out_degree(node) == 0]
-    shortest_paths = []
+    def __repr__(self):
+        return f"{list(self.A)}"
+
+    def shift(self, jobs: int, time: int):
+        """
+        Returns this state with the indices of the jobs increased by jobs and all times
+        increased by time. The jobs with a lower index than jobs are dispatched in it.
+        """
+        return State(
+            tuple((A_min + time, A_max + time) for A_min, A_max in self.A),
+            tuple((x + jobs, EFT + time, LFT + time) for x, EFT, LFT in self.XF),
+            (self.JP << jobs) | ((1 << jobs) - 1),
+        )
+
+    def retire(self, jobs: int):
+        """
+        Returns this state with the indices of the jobs decreased by jobs. The jobs with
+        a lower index than jobs must be dispatched and not running in it (see
+        dispatched_prefix).
+        """
+        return State(
+            self.A,
+            tuple((x - jobs, EFT, LFT) for x, EFT, LFT in self.XF),
+            self.JP >> jobs,
+        )
+
+    def same_running_jobs(self, other) -> bool:
+        """
+        Checks whether both states have the same jobs in XF.
+        """
+        return len(self.XF) == len(other.XF) and all(
+            x == y for (x, _, _), (y, _, _) in zip(self.XF, other.XF)
+        )
+
+    def can_merge(self, other) -> bool:
+        """
+        Checks the merge rule of the ECRTS 2019 paper, assuming that both states
+        have the same set of dispatched jobs: the same jobs must be running and
+        the availability intervals of every core must overlap.
+        """
+        if not self.same_running_jobs(other):
+            return False
+
+        for (a_min, a_max), (b_min, b_max) in zip(self.A, other.A):
+            if a_max < b_min or b_max < a_min:
+                return False
+
+        return True
+
+    def dominates(self, other) -> bool:
+        """
+        Checks whether this state covers other, assuming that both states have the same
+        set of dispatched jobs: the same jobs must be running, and every core availability
+        interval and finish time interval of other must lie within the one of this state.
+        Merging other into this state would give this state.
+        """
+        if not self.same_running_jobs(other):
+            return False
+
+        for (a_min, a_max), (b_min, b_max) in zip(self.A, other.A):
+            if b_min < a_min or a_max < b_max:
+                return False
+
+        for (_, EFT, LFT), (_, other_EFT, other_LFT) in zip(self.XF, other.XF):
+            if other_EFT < EFT or LFT < other_LFT:
+                return False
+
+        return True
+
+    def merge(self, other):
+        """
+        Returns a new state whose core availability and finish time intervals
+        cover the intervals of both states.
+        """
+        return State(merge_A(self, other), merge_XF(self, other), self.JP)
+
+
+def merge_A(state: State, other: State) -> tuple:
+    """
+    Returns the core availability intervals that cover the ones of both states.
+    """
+    return tuple(
+        (min(a_min, b_min), max(a_max, b_max))
+        for (a_min, a_max), (b_min, b_max) in zip(state.A, other.A)
+    )
 
-    for leaf in leaves:
-        sp = nx.shortest_path(G, source=0, target=leaf)
-        shortest_paths.append(sp)
 
-    return min(shortest_paths, key=len)
+def merge_XF(state: State, other: State) -> tuple:
+    """
+    Returns the finish time intervals that cover the ones of both states, which must
+    have the same running jobs.
+    """
+    return tuple(
+        (x, min(EFT, other_EFT), max(LFT, other_LFT))
+        for (x, EFT, LFT), (_, other_EFT, other_LFT) in zip(state.XF, other.XF)
+    )
 
 
-class State:
+def expand_state(context: tuple, BR: list, WR: list, v_p: State, ready: int) -> list:
     """
-    A state in the Schedule Abstraction Graph.
+    Returns the successors of state v_p as a list of (i, successor state, EFTi, LFTi),
+    where i is the index of the dispatched job and ready the bitmask of the ready jobs.
+    context is (jobs, pred_sets, m, INF) and BR/WR are the response times found so far,
+    indexed by job index (at least for the predecessors of jobs, see FrontierExpander);
+    none of them are changed.
+    """
+    jobs, pred_sets, m, INF = context
+    r_min, r_max, C_min, C_max, p = (
+        jobs.r_min,
+        jobs.r_max,
+        jobs.C_min,
+        jobs.C_max,
+        jobs.p,
+    )
+    successors = []
+
+    R_P = list(iter_bits(ready))
+    A = v_p.A
+    FTI = {x: (EFT, LFT) for x, EFT, LFT in v_p.XF}
+    A1 = A[0]
+    A1_min = A1[0]
+    A1_max = A1[1]
+
+    def EFT_star(x):
+        if x in FTI:
+            return FTI[x][0]  # EFT_x(v_p)
+        else:
+            return BR[x]
+
+    def LFT_star(x):
+        if x in FTI:
+            return FTI[x][1]  # LFT_x(v_p)
+        else:
+            return WR[x]
+
+    def R_min(a):
+        return max(r_min[a], max([EFT_star(y) for y in pred_sets[a]], default=0))
+
+    def R_max(a):
+        return max(r_max[a], max([LFT_star(y) for y in pred_sets[a]], default=0))
+
+    # The predecessors of the ready jobs are dispatched in v_p, so their R_max
+    # does not change while the ready jobs are dispatched one by one below.
+    by_priority = PriorityIndex(R_P, p, pred_sets, R_max)
+    t_wc = max(A1_max, by_priority.min_R_max(INF))
+
+    for i in R_P:
+
+        def th(x):
+            return max(
+                r_max[x],
+                max(
+                    [LFT_star(y) for y in pred_sets[x].difference(pred_sets[i])],
+                    default=0,
+                ),
+            )
+
+        ESTi = max(R_min(i), A1_min)
+        t_high = by_priority.t_high(p[i], pred_sets[i], th, INF)
+        LSTi = min(t_wc, t_high - 1)
+
+        if ESTi <= LSTi:
+            EFTi = ESTi + C_min[i]
+            LFTi = LSTi + C_max[i]
+            PA = [
+                max(ESTi, A[idx][0]) for idx in range(1, m)
+            ]  # {max{ESTi, A_x_min} | 2 <= x <= m}
+            CA = [
+                max(ESTi, A[idx][1]) for idx in range(1, m)
+            ]  # {max{ESTi, A_x_max} | 2 <= x <= m}
+
+            PA.append(EFTi)
+            CA.append(LFTi)
+
+            for c in FTI.keys() & pred_sets[i]:
+                LFTc = FTI[c][1]
+                if LSTi < LFTc and LFTc in CA:
+                    # TODO: Check if CA.index(LFTc) is correct here
+                    CA[CA.index(LFTc)] = LSTi
+
+            PA.sort()
+            CA.sort()
+
+            new_A = tuple(zip(PA, CA))
+
+            new_XF = [(x, EFTx, LFTx) for x, EFTx, LFTx in v_p.XF if LSTi <= EFTx]
+            new_XF.append((i, EFTi, LFTi))
+            new_XF.sort()
+
+            new_JP = v_p.JP | (1 << i)
+            new_state = State(new_A, tuple(new_XF), new_JP)
+            successors.append((i, new_state, EFTi, LFTi))
+
+    return successors
+
+
+def admit_released_jobs(feed: JobFeed, states: list):
+    """
+    Adds the jobs of feed that can be dispatched next from one of the states to the job
+    table, assuming that there are no precedence constraints.
+
+    From a state, a job can only be dispatched if its r_min is at most
+    t_wc = max(A1_max, min r_max of the ready jobs). The jobs that are not in the table
+    yet are released later than the ones in it, so the minimum over the ready jobs in the
+    table is an upper bound on t_wc. First, jobs are added until every state has a ready
+    job (unless the feed is exhausted), then all jobs with r_min up to the largest bound.
+    The jobs that are left out can neither be dispatched nor interfere with the others.
+    """
+    jobs = feed.jobs
+    horizon = None
+    for state in states:
+        ready = ((1 << len(jobs)) - 1) & ~state.JP
+        while ready == 0 and not feed.exhausted:
+            ready = feed.admit_until(feed.next_release)
+        if ready == 0:
+            continue
 
-    Attributes:
-        A   List of core availability intervals
-        X   Set of jobs that are being executed by one of the cores
-        FTI Finish Time Intervals - a tuple [EFT, LFT] for each job in X
-            EFT = Earliest Finish Time
-            LFT = Latest Finish TIme
+        bound = max(state.A[0][1], min(jobs.r_max[j] for j in iter_bits(ready)))
+        horizon = bound if horizon is None else max(horizon, bound)
+
+    if horizon is not None:
+        feed.admit_until(horizon)
+
+
+def dispatched_prefix(states: list) -> int:
+    """
+    Returns the number of jobs, from index 0 on, that are dispatched and not running
+    in every state of states.
     """
+    if len(states) == 0:
+        return 0
 
-    def __init__(self, A: list[tuple], X: set, FTI: dict):
-        self.A = A
-        self.X = X
-        self.FTI = FTI
+    dispatched = -1
+    running = None
+    for state in states:
+        dispatched &= state.JP
+        if len(state.XF) > 0:
+            running = (
+                state.XF[0][0] if running is None else min(running, state.XF[0][0])
+            )
 
-    def __repr__(self):
-        return f"{self.A}"
+    # Number of trailing ones of dispatched
+    count = (~dispatched & (dispatched + 1)).bit_length() - 1
+    return count if running is None else min(count, running)
+
+
+def analyze_busy_window(window: tuple) -> tuple[dict, dict]:
+    """
+    Returns BR and WR of one busy window, given as (jobs, PRED, m, options).
+    """
+    jobs, PRED, m, options = window
+    _, BR, WR = ScheduleGraphConstructionAlgorithm(
+        set(jobs.keys()),
+        m,
+        jobs,
+        PRED,
+        logging.Logger("SAGPY", logging.CRITICAL),
+        keep_graph=False,
+        **options,
+    )
+    return BR, WR
+
+
+def analyze_busy_windows(
+    jobs: JobTable, PRED: dict, windows: list, m: int, workers: int, options: dict
+) -> tuple[dict, dict]:
+    """
+    Analyzes each busy window (see sagpy.jobs.split_busy_windows) on its own, on a pool
+    of workers processes if workers > 1, and returns BR and WR of all jobs.
+    """
+    runs = []
+    for window in windows:
+        window_jobs = jobs.select(window)
+        window_PRED = {Ji: PRED.get(Ji, set()) for Ji in window_jobs.names}
+        runs.append((window_jobs, window_PRED, m, options))
+
+    BR, WR = dict(), dict()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        results = (
+            map(analyze_busy_window, runs)
+            if pool is None
+            else pool.map(analyze_busy_window, runs)
+        )
+        for window_BR, window_WR in results:
+            BR.update(window_BR)
+            WR.update(window_WR)
+    except DeadlineMiss as miss:
+        # The response times of the windows before the miss are known as well
+        miss.BR = {**BR, **miss.BR}
+        miss.WR = {**WR, **miss.WR}
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    return {Ji: BR[Ji] for Ji in jobs.names}, {Ji: WR[Ji] for Ji in jobs.names}
 
 
 @sag_algorithm
 def ScheduleGraphConstructionAlgorithm(
     J: set,
     m: int,
-    JDICT: dict,
+    JDICT: dict | JobTable,
     PRED: dict,
     logger=logging.Logger("SAGPY", logging.CRITICAL),
-) -> tuple[nx.DiGraph, dict, dict]:
+    merge: bool = True,
+    prune_dominated: bool = False,
+    keep_graph: bool = True,
+    stop_on_deadline_miss: bool = False,
+    workers: int = 1,
+    exporter=None,
+    job_feed=None,
+    busy_windows: bool = False,
+    hyperperiod: tuple = None,
+) -> tuple["nx.DiGraph", dict, dict]:
+    """
+    The SAG is explored breadth-first, one level (i.e. number of dispatched jobs) at a time.
+    JDICT can be a dictionary of jobs or a JobTable. Internally, jobs are referred to by
+    their index in the job table.
+
+    Options:
+        merge       Merge the states that have the same set of dispatched jobs,
+                    the same running jobs and overlapping core availability intervals.
+        prune_dominated
+                    Without merge, drop the new states that another state of the next
+                    level dominates (see State.dominates and add_or_prune_state), and
+                    replace the states that a new state dominates. No interval is
+                    widened, so without precedence constraints BR/WR are those of
+                    merge=False, from fewer states. With precedence constraints, the
+                    release of a job depends on the response times found so far for
+                    its finished predecessors, so the bounds depend on which states
+                    are explored and can differ from merge=False, as with merge.
+                    With merge, dominated states are merged anyway.
+        keep_graph  Return the whole SAG. Otherwise (response-times-only mode), no edges
+                    are stored and each level is dropped as soon as all its successors
+                    exist, so only BR/WR and the frontier are kept in memory, and None
+                    is returned instead of the graph.
+        stop_on_deadline_miss
+                    Check schedulability: as soon as the latest finish time of a job
+                    exceeds its (absolute) deadline d, stop and raise DeadlineMiss.
+                    Jobs without a deadline are never late.
+        workers     Number of processes that expand the states of each level (see
+                    sagpy.frontier.FrontierExpander). The new states are still added,
+                    merged and accounted for in BR/WR by this process, in the same order.
+        exporter    A sagpy.export.SAGExporter to which every state and edge is written
+                    as soon as the level of the state is complete.
+        job_feed    An iterable of jobs sorted by r_min (see sagpy.jobs.JobFeed), which
+                    are added to the jobs of JDICT as the exploration reaches them, so
+                    that each state only looks at the jobs released up to its horizon
+                    (see admit_released_jobs). Without keep_graph, the jobs that every
+                    state of a level has dispatched and finished are retired from the
+                    job table, BR/WR and the states once they are half of the table
+                    (see dispatched_prefix), so memory follows the active jobs rather
+                    than the horizon, apart from the response times of the retired jobs.
+                    Requires one worker and no precedence constraints.
+        busy_windows
+                    Split the jobs into busy windows (see sagpy.jobs.split_busy_windows)
+                    and explore a separate SAG for each of them, on a pool of workers
+                    processes if workers > 1. Only for the response times
+                    (keep_graph=False) without an exporter or a job feed.
+        hyperperiod (H, N) if the jobs of job_feed repeat every N jobs, released H
+                    later, e.g. periodic tasks with hyperperiod H and N jobs per
+                    hyperperiod (see generate_jobs.release_ordered_jobs). Every N
+                    levels, the states are compared with the states N levels before,
+                    shifted by N jobs and H. If they are the same, the rest of the
+                    exploration would repeat itself, so it stops there: the jobs that
+                    were added get the BR/WR of the job N before them if that bound is
+                    worse, and the SAG (if kept) is the SAG up to that level.
+    """
     INF = 100000  # Representation for infinity
-    G = nx.DiGraph()
-    BR = {Ji: INF for Ji in J}
-    WR = {Ji: 0 for Ji in J}
-    InitNode = State([(0, 0) for core in range(m)], set(), dict())
-    G.add_node(0, state=InitNode)
-
-    P = shortestPathFromSourceToLeaf(G)
-    while len(P) - 1 < len(J):
-        J_P = set([G[u][v]["job"] for u, v in zip(P[:-1], P[1:])])
-        R_P = set([job for job in J.difference(J_P) if PRED[job].issubset(J_P)])
-        v_p = G.nodes[P[-1]]["state"]
-        A = v_p.A
-        X = v_p.X
-        FTI = v_p.FTI
-        A1 = A[0]
-        A1_min = A1[0]
-        A1_max = A1[1]
-
-        for Ji in R_P:
-            r_min, r_max, C_min, C_max, p_i = JDICT[Ji]
-
-            def EFT_star(Jx):
-                if Jx in X:
-                    return FTI[Jx][0]  # EFT_x(v_p)
-                else:
-                    return BR[Jx]
-
-            def LFT_star(Jx):
-                if Jx in X:
-                    return FTI[Jx][1]  # LFT_x(v_p)
-                else:
-                    return WR[Jx]
-
-            def th(Jx):
-                rx_max = JDICT[Jx][1]
-                return max(
-                    rx_max,
-                    max(
-                        [LFT_star(Jy) for Jy in PRED[Jx].difference(PRED[Ji])],
-                        default=0,
-                    ),
-                )
-
-            def R_min(Ja):
-                ra_min = JDICT[Ja][0]
-                return max(ra_min, max([EFT_star(Jy) for Jy in PRED[Ja]], default=0))
-
-            def R_max(Ja):
-                ra_max = JDICT[Ja][1]
-                return max(ra_max, max([LFT_star(Jy) for Jy in PRED[Ja]], default=0))
-
-            ESTi = max(R_min(Ji), A1_min)
-            t_wc = max(A1_max, min([R_max(Jb) for Jb in R_P], default=INF))
-            t_high = min([th(Jz) for Jz in R_P if JDICT[Jz][4] < p_i], default=INF)
-            LSTi = min(t_wc, t_high - 1)
-
-            if ESTi <= LSTi:
-                EFTi = ESTi + C_min
-                LFTi = LSTi + C_max
-                PA = [
-                    max(ESTi, A[idx][0]) for idx in range(1, m)
-                ]  # {max{ESTi, A_x_min} | 2 <= x <= m}
-                CA = [
-                    max(ESTi, A[idx][1]) for idx in range(1, m)
-                ]  # {max{ESTi, A_x_max} | 2 <= x <= m}
-
-                PA.append(EFTi)
-                CA.append(LFTi)
-
-                for Jc in X.intersection(PRED[Ji]):
-                    LFTc = FTI[Jc][1]
-                    if LSTi < LFTc and LFTc in CA:
-                        # TODO: Check if CA.index(LFTc) is correct here
-                        CA[CA.index(LFTc)] = LSTi
-
-                PA.sort()
-                CA.sort()
-
-                new_A = [(0, 0) for i in range(m)]
-                for i in range(m):
-                    new_A[i] = (PA[i], CA[i])
-
-                new_X = set()
-                for Jx in v_p.X:
-                    EFTx = v_p.FTI[Jx][0]
-                    if LSTi <= EFTx:
-                        new_X.add(Jx)
-                new_X.add(Ji)
-
-                new_FTI = dict()
-                for Jx in new_X:
-                    if Jx in v_p.FTI:
-                        new_FTI[Jx] = v_p.FTI[Jx]
-                new_FTI[Ji] = (EFTi, LFTi)
-
-                new_state = State(new_A, new_X, new_FTI)
-                new_state_id = get_rand_node_id()
-                G.add_node(new_state_id, state=new_state)
-                G.add_edge(P[-1], new_state_id, job=Ji)
-
-                BR[Ji] = min(EFTi - r_min, BR[Ji])
-                WR[Ji] = max(LFTi - r_max, WR[Ji])
-
-        # Next iteration
-        P = shortestPathFromSourceToLeaf(G)
-
+    feed = None
+    if hyperperiod is not None and job_feed is None:
+        raise ValueError("Repeating hyperperiods are only detected in a job feed!")
+    elif job_feed is None:
+        jobs = as_job_table(J, JDICT)
+    elif workers != 1 or any(len(preds) > 0 for preds in PRED.values()):
+        raise ValueError(
+            "A job feed requires one worker and no precedence constraints!"
+        )
+    else:
+        # The jobs of the feed are added to a copy of the table
+        jobs = JobTable.from_dict(JDICT, J)
+        feed = JobFeed(jobs, job_feed)
+    names = jobs.names
+    precedence = PrecedenceIndex(jobs, PRED)
+    if busy_windows:
+        if keep_graph or exporter is not None or feed is not None:
+            raise ValueError(
+                "Busy windows are only analyzed separately for the response times, without an exporter or a job feed!"
+            )
+
+        windows = split_busy_windows(jobs, precedence.preds)
+        logger.debug(f"{len(windows)} busy windows")
+        if len(windows) > 1:
+            BR, WR = analyze_busy_windows(
+                jobs,
+                PRED,
+                windows,
+                m,
+                workers,
+                {
+                    "merge": merge,
+                    "prune_dominated": prune_dominated,
+                    "stop_on_deadline_miss": stop_on_deadline_miss,
+                },
+            )
+            logger.debug(f"BR: {BR}")
+            logger.debug(f"WR: {WR}")
+            return None, BR, WR
+
+    G = ScheduleGraph(keep_edges=keep_graph, exporter=exporter, job_names=names)
+    r_min, r_max, d = jobs.r_min, jobs.r_max, jobs.d
+    pred_sets = precedence.preds
+    all_jobs = (1 << len(jobs)) - 1
+    # Response times, indexed by job index
+    BR = [INF for Ji in names]
+    WR = [0 for Ji in names]
+    InitNode = State(tuple((0, 0) for core in range(m)), (), 0)
+    G.add_node(InitNode)
+    # States of the level that is being expanded, with their ready jobs and countdown,
+    # and the path that leads to them when deadline misses are checked (see unwind_path).
+    # The merge groups hold the unexpanded states of the next level that are candidates
+    # for merging, grouped by their set of dispatched jobs.
+    level = [(0, *precedence.initial_ready(), None)]
+    # Number of jobs dispatched in the states of level, and the states of the last
+    # hyperperiod boundary (see the hyperperiod option)
+    depth = 0
+    boundary = None
+    # Names and BR/WR of the jobs retired from the front of the job table (see the
+    # job_feed option), whose indices are below those of the jobs in the table
+    retire = feed is not None and not keep_graph
+    retired_names, retired_BR, retired_WR = [], [], []
+
+    predecessors = [y for y, succ in enumerate(precedence.successors) if len(succ) > 0]
+    with FrontierExpander(
+        expand_state, (jobs, pred_sets, m, INF), workers, predecessors
+    ) as expander:
+        while len(level) > 0:
+            next_level = []
+            merge_groups = dict()
+
+            # States of this level cannot be merged anymore, but some were merged into
+            # others while the previous level was expanded.
+            level = [entry for entry in level if entry[0] in G]
+            if feed is not None:
+                admit_released_jobs(feed, [G.states[entry[0]] for entry in level])
+                added = len(jobs) - len(BR)
+                BR.extend([INF] * added)
+                WR.extend([0] * added)
+                precedence.add_jobs(added)
+                all_jobs = (1 << len(jobs)) - 1
+                # Without precedence constraints, the jobs that are not dispatched are ready
+                level = [
+                    (node_id, all_jobs & ~G.states[node_id].JP, waiting, path)
+                    for node_id, _, waiting, path in level
+                ]
+
+            at_boundary = hyperperiod is not None and depth % hyperperiod[1] == 0
+            if at_boundary:
+                H, N = hyperperiod
+                states = [G.states[entry[0]] for entry in level]
+                # The comparison only holds if the feed went on beyond every state so far
+                if boundary is not None and not feed.exhausted:
+                    if [state.shift(N, H) for state in boundary] == states:
+                        logger.info(
+                            f"The schedule repeats after {depth // N} hyperperiods!"
+                        )
+                        break
+
+            # With hyperperiods, jobs are only retired at the boundaries, so that the
+            # states of two boundaries have the same job indices
+            if retire and (hyperperiod is None or at_boundary):
+                count = dispatched_prefix([G.states[entry[0]] for entry in level])
+                if count > 0 and 2 * count >= len(jobs):
+                    retired_names.extend(names[:count])
+                    retired_BR.extend(BR[:count])
+                    retired_WR.extend(WR[:count])
+                    del BR[:count]
+                    del WR[:count]
+                    jobs.retire(count)
+                    precedence.retire(count)
+                    all_jobs = (1 << len(jobs)) - 1
+                    for node_id, _, _, _ in level:
+                        G.states[node_id] = G.states[node_id].retire(count)
+                    level = [
+                        (node_id, all_jobs & ~G.states[node_id].JP, waiting, path)
+                        for node_id, _, waiting, path in level
+                    ]
+
+            if at_boundary:
+                boundary = [G.states[entry[0]] for entry in level]
+            expansions = expander.map(
+                [(G.states[node_id], ready) for node_id, ready, _, _ in level], BR, WR
+            )
+
+            for (node_id, ready, waiting, path), successors in zip(level, expansions):
+                for i, new_state, EFTi, LFTi in successors:
+                    new_JP = new_state.JP
+                    new_path = (
+                        (len(retired_names) + i, path)
+                        if stop_on_deadline_miss
+                        else None
+                    )
+                    if merge:
+                        group = merge_groups.setdefault(new_JP, [])
+                        new_state_id = add_or_merge_state(G, group, new_state)
+                    elif prune_dominated:
+                        bucket = merge_groups.setdefault(new_JP, [])
+                        new_state_id = add_or_prune_state(G, bucket, new_state)
+                    else:
+                        new_state_id = G.add_node(new_state)
+                    G.add_edge(node_id, new_state_id, i)
+
+                    # A state that was merged into an existing one is already in the next level,
+                    # and a state in which all jobs are dispatched has nothing to expand.
+                    if G.in_degree[new_state_id] == 1 and (
+                        new_JP != all_jobs or (feed is not None and not feed.exhausted)
+                    ):
+                        new_ready, new_waiting = precedence.after_dispatch(
+                            ready, waiting, i
+                        )
+                        next_level.append(
+                            (new_state_id, new_ready, new_waiting, new_path)
+                        )
+
+                    BR[i] = min(EFTi - r_min[i], BR[i])
+                    WR[i] = max(LFTi - r_max[i], WR[i])
+
+                    if stop_on_deadline_miss and LFTi > d[i]:
+                        all_names = retired_names + names
+                        all_BR, all_WR = retired_BR + BR, retired_WR + WR
+                        raise DeadlineMiss(
+                            names[i],
+                            [all_names[j] for j in unwind_path(new_path)],
+                            LFTi - d[i],
+                            {
+                                Ji: all_BR[j]
+                                for j, Ji in enumerate(all_names)
+                                if all_BR[j] != INF
+                            },
+                            {
+                                Ji: all_WR[j]
+                                for j, Ji in enumerate(all_names)
+                                if all_BR[j] != INF
+                            },
+                        )
+
+            G.flush()
+            if not keep_graph:
+                # All successors of this level exist, so its states are not needed anymore
+                for entry in level:
+                    G.remove_node(entry[0])
+            level = next_level
+            depth += 1
+
+    if len(retired_names) > 0:
+        names = retired_names + names
+        BR = retired_BR + BR
+        WR = retired_WR + WR
+
+    if len(level) > 0:
+        # The exploration stopped at a repeating hyperperiod: the jobs that would be
+        # dispatched from there on are dispatched N jobs (and H) earlier as well
+        N = hyperperiod[1]
+        for i in range(N, len(names)):
+            BR[i] = min(BR[i], BR[i - N])
+            WR[i] = max(WR[i], WR[i - N])
+    elif hyperperiod is not None:
+        logger.warning("The schedule did not repeat before the job feed ran out!")
+
+    BR = {Ji: BR[i] for i, Ji in enumerate(names)}
+    WR = {Ji: WR[i] for i, Ji in enumerate(names)}
     logger.debug(f"BR: {BR}")
     logger.debug(f"WR: {WR}")
 
-    return G, BR, WR
+    return G.to_networkx(names) if keep_graph else None, BR, WR
@@ -1,355 +1,556 @@
-import networkx as nx
-import random
 import logging
+from typing import TYPE_CHECKING
 import tqdm
-from sagpy.sag_template import sag_algorithm
-
-
-class StateROS:
+from sagpy.sag_template import sag_algorithm, DeadlineMiss
+from sagpy.sag_graph import (
+    ScheduleGraph,
+    add_or_merge_state,
+    add_or_prune_state,
+    unwind_path,
+)
+from sagpy.frontier import FrontierExpander
+from sagpy.sag_algorithms.ecrts2019 import State, merge_A, merge_XF
+from sagpy.jobs import (
+    JobTable,
+    as_job_table,
+    PrecedenceIndex,
+    PriorityIndex,
+    ReleaseIndex,
+)
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+
+class StateROS(State):
     """
-    A state in the Schedule Abstraction Graph.
+    A state in the Schedule Abstraction Graph, hashable like State.
 
     Attributes:
-        A   List of core availability intervals
-        X   Set of jobs that are being executed by one of the cores
-        FTI Finish Time Intervals - a tuple [EFT, LFT] for each job in X
+        A   Tuple of core availability intervals
+        XF  Tuple of (x, EFT, LFT) for each (index of a) job x that is being executed by
+            one of the cores, sorted by x, with its Finish Time Interval [EFT, LFT]
             EFT = Earliest Finish Time
             LFT = Latest Finish TIme
         PP  An interval [PP_min, PP_max] that contains the earliest and the latest
             moments in time when a polling point (PP) could happen
         NOJ An integer that represents the number of jobs that exist in the wait_set
+        JP  Bitmask of the jobs dispatched on the path to this state (see sagpy.jobs.JobTable)
     """
 
+    __slots__ = ("PP", "PP2", "NOJ")
+
     def __init__(
         self,
-        A: list[tuple],
-        X: set,
-        FTI: dict,
+        A: tuple,
+        XF: tuple,
         PP: tuple[int, int],
         PP2: tuple[int, int],
         NOJ: int,
+        JP: int = 0,
     ):
-        self.A = A
-        self.X = X
-        self.FTI = FTI
+        State.__init__(self, A, XF, JP)
         self.PP = PP
         self.PP2 = PP2
         self.NOJ = NOJ
 
+    def _args(self) -> tuple:
+        return (self.A, self.XF, self.PP, self.PP2, self.NOJ, self.JP)
+
     def __repr__(self):
-        return f"{self.A}{self.PP}{self.PP2}"
+        return f"{list(self.A)}{self.PP}{self.PP2}"
+
+    def can_merge(self, other) -> bool:
+        """
+        Checks whether two states with the same set of dispatched jobs can be merged.
+
+        On top of the ECRTS 2019 rule (same running jobs, overlapping core availability
+        intervals), the polling points must be compatible. A certain polling point
+        (PP_min == PP_max) selects the certainly eligible jobs and is compared with the
+        parent state, so it is only merged with the very same polling point.
+        Two uncertain polling points are joined when they overlap; the eligible jobs
+        then follow from the widened PP_max, which covers both states.
+        PP2 is only ever compared for equality, so it must be the same.
+        """
+        if (
+            self.PP2 != other.PP2
+            or self.NOJ != other.NOJ
+            or not self.same_running_jobs(other)
+        ):
+            return False
+
+        for (a_min, a_max), (b_min, b_max) in zip(self.A, other.A):
+            if a_max < b_min or b_max < a_min:
+                return False
+
+        if self.PP == other.PP:
+            return True
+
+        if self.PP[0] == self.PP[1] or other.PP[0] == other.PP[1]:
+            return False
+
+        return not (self.PP[1] < other.PP[0] or other.PP[1] < self.PP[0])
+
+    def dominates(self, other) -> bool:
+        """
+        Checks State.dominates, with the same polling point constraints as can_merge:
+        an uncertain polling point interval of other must lie within the one of this
+        state, and a certain one must be the very same.
+        """
+        if self.PP2 != other.PP2 or self.NOJ != other.NOJ:
+            return False
+
+        if self.PP != other.PP and (
+            self.PP[0] == self.PP[1]
+            or other.PP[0] == other.PP[1]
+            or other.PP[0] < self.PP[0]
+            or self.PP[1] < other.PP[1]
+        ):
+            return False
+
+        return super().dominates(other)
+
+    def merge(self, other):
+        """
+        Returns a new state whose core availability, finish time and polling point
+        intervals cover the intervals of both states.
+        """
+        PP = (min(self.PP[0], other.PP[0]), max(self.PP[1], other.PP[1]))
+
+        return StateROS(
+            merge_A(self, other), merge_XF(self, other), PP, self.PP2, self.NOJ, self.JP
+        )
 
 
-def get_rand_node_id():
+def expand_state(
+    context: tuple,
+    BR: list,
+    WR: list,
+    v_p: StateROS,
+    ready: int,
+    cursors: tuple[int, int],
+    parent_state: StateROS,
+    last_dispatched_job: int,
+) -> list:
     """
-    Acts like a hash function for node IDs.
-    It just spits random integers between 10^6 to 10^7 - 1.
+    Returns the successors of state v_p as a list of (i, successor state, EFTi, LFTi),
+    where i is the index of the dispatched job. ready is the bitmask of the ready jobs,
+    cursors are the cursors of v_p into the release orders (see ReleaseIndex), and
+    parent_state and last_dispatched_job are the state and job on the edge to v_p.
+    context is (jobs, pred_sets, release, m, INF, logger) and BR/WR are the response
+    times found so far, indexed by job index (at least for the predecessors of jobs, see
+    FrontierExpander); none of them are changed.
     """
+    jobs, pred_sets, release, m, INF, logger = context
+    debug = logger.isEnabledFor(logging.DEBUG)
+    names = jobs.names
+    r_min, r_max, C_min, C_max, p = (
+        jobs.r_min,
+        jobs.r_max,
+        jobs.C_min,
+        jobs.C_max,
+        jobs.p,
+    )
+    successors = []
+
+    def job_names(job_set):
+        return {names[j] for j in job_set}
+
+    PP = v_p.PP
+    PP2 = v_p.PP2
+    A = v_p.A
+    FTI = {x: (EFT, LFT) for x, EFT, LFT in v_p.XF}
+
+    A1 = A[0]
+    A1_min = A1[0]
+    A1_max = A1[1]
+
+    # The ready jobs R_P are not enumerated: the sets below are read from the
+    # release orders, between the cursors and the polling point.
+    c_min, c_max = cursors
+    ################ ROS ##############
+    old_PP = PP
+    C_E_P = release.ready_released_by("r_max", PP[1], c_max, ready)
+    if len(C_E_P) == 0:
+        PRT = release.min_ready("r_min", c_min, ready)
+        CRT = release.min_ready("r_max", c_max, ready)
+        pp_min = max(PRT, A1_min)
+        pp_max = max(CRT, A1_max)
+        PP = (pp_min, pp_max)
+
+    if debug and old_PP != PP:
+        logger.debug(
+            f"The PP changed from {old_PP} to {PP}; we are in state with A = {A}"
+        )
+    elif debug:
+        logger.debug(f"The PP is the same, i.e. {PP}; we are in state with A = {A}")
+
+    E_P = set()  # Set that contains the eligible jobs for dispatch from this state.
+    # Certainly eligible jobs                r_max <= PP_max
+    if PP != old_PP:
+        C_E_P = release.ready_released_by("r_max", PP[1], c_max, ready)
+    # Possibly eligible jobs                r_min <= PP_max
+    P_E_P = release.ready_released_by("r_min", PP[1], c_min, ready)
+    P_LP_E = set()
+
+    # One of the two
+    if (
+        PP[0] < PP[1]
+    ):  # Then it's uncertain when a polling point happened, so we must consider all jobs that *could* be in the wait_set.
+        E_P = P_E_P
+    elif PP[0] == PP[1]:  # PP definitely happened at PP[0] == PP[1]
+        E_P = C_E_P
+
+        """
+        The wait_set is C_E_P by now if all cores were busy and there were still sufficiently many jobs in the wait_set for all cores.
+        If the PP == A_m(previous state) then a PP certainly happened when all cores certainly became available,
+        so it means that there were not sufficient jobs in the wait_set to satisfy all cores.
+        Thus, we need to check whether the PP in this state was triggered by one of the cores which had no job to do.
+        """
+        if parent_state != None:
+            if parent_state.A[m - 1] == PP:
+                E_P = P_E_P
+
+        """
+        At this point a PP certainly happened sometime in the past, but we don't know what jobs are certainly in the wait_set.
+        However, since a PP certainly happened then the last released job was the highest priority job in the wait_set.
+        So the job on the graph-edge that brought us to this current state, was certainly the highest priority job in the wait_set.
+        Then, from this state we cannot dispatch jobs with a higher priority than the one just dispatched, because they weren't added to the wait_set.
+        [Somehow explain why we use P_E_P when all jobs in P_E_P are lower priority than last dispatched job and
+         v_p(PP) == v_p'(PP) (i.e. the PP is unchanged)]
+        """
+        if parent_state != None:
+            if parent_state.PP != PP:
+                all_possible_jobs_lower_priority_than_last_job = True
 
-    n = 6
-    lower_bound = 10 ** (n - 1)
-    upper_bound = 10**n - 1
-    return random.randint(lower_bound, upper_bound)
-
-
-def shortestPathFromSourceToLeaf(G):
-    leaves = [node for node in G.nodes if G.out_degree(node) == 0]
-    shortest_paths = []
-
-    for leaf in leaves:
-        sp = nx.shortest_path(G, source=0, target=leaf)
-        shortest_paths.append(sp)
-
-    return min(shortest_paths, key=len)
-
-
-@sag_algorithm
-def ScheduleGraphConstructionAlgorithmROS(
-    J: set,
-    m: int,
-    JDICT: dict,
-    PRED: dict,
-    logger=logging.Logger("SAGPY", logging.CRITICAL),
-) -> tuple[nx.DiGraph, dict, dict]:
-    bar = tqdm.tqdm(desc="[SAGPY-ROS] Progress")  # Progress bar
-    INF = 100000  # Representation of infinity
-    G = nx.DiGraph()
-    BR = {Ji: INF for Ji in J}
-    WR = {Ji: 0 for Ji in J}
-    InitNode = StateROS([(0, 0) for core in range(m)], set(), dict(), (0, 0), (0, 0), 0)
-    G.add_node(0, state=InitNode)
-
-    P = shortestPathFromSourceToLeaf(G)
-    while len(P) - 1 < len(J):
-        J_P = set([G[u][v]["job"] for u, v in zip(P[:-1], P[1:])])
-        v_p = G.nodes[P[-1]]["state"]
-        parent_state = G.nodes[P[-2]]["state"] if v_p != InitNode else None
-        last_dispatched_job = G[P[-2]][P[-1]]["job"] if v_p != InitNode else ""
-        PP = v_p.PP
-        PP2 = v_p.PP2
-        A = v_p.A
-        X = v_p.X
-        FTI = v_p.FTI
-
-        A1 = A[0]
-        A1_min = A1[0]
-        A1_max = A1[1]
-
-        # R_P = J.difference(J_P)
-        R_P = set([job for job in J.difference(J_P) if PRED[job].issubset(J_P)])
-        ################ ROS ##############
-        old_PP = PP
-        C_E_P = set([Ji for Ji in R_P if JDICT[Ji]["r_max"] <= PP[1]])
-        if len(C_E_P) == 0:
-            PRT = min([JDICT[Jw]["r_min"] for Jw in R_P])
-            CRT = min([JDICT[Jw]["r_max"] for Jw in R_P])
-            pp_min = max(PRT, A1_min)
-            pp_max = max(CRT, A1_max)
-            PP = (pp_min, pp_max)
-
-        if old_PP != PP:
-            logger.debug(
-                f"The PP changed from {old_PP} to {PP}; we are in state with A = {A}"
-            )
-        else:
-            logger.debug(f"The PP is the same, i.e. {PP}; we are in state with A = {A}")
-
-        E_P = set()  # Set that contains the eligible jobs for dispatch from this state.
-        # Certainly eligible jobs                r_max <= PP_max
-        C_E_P = set([Ji for Ji in R_P if JDICT[Ji]["r_max"] <= PP[1]])
-        # Possibly eligible jobs                r_min <= PP_max
-        P_E_P = set([Ji for Ji in R_P if JDICT[Ji]["r_min"] <= PP[1]])
-        P_LP_E = set()
+                for v in P_E_P:
+                    if p[v] < p[last_dispatched_job]:
+                        all_possible_jobs_lower_priority_than_last_job = False
 
-        # One of the two
-        if (
-            PP[0] < PP[1]
-        ):  # Then it's uncertain when a polling point happened, so we must consider all jobs that *could* be in the wait_set.
-            E_P = P_E_P
-        elif PP[0] == PP[1]:  # PP definitely happened at PP[0] == PP[1]
-            E_P = C_E_P
-
-            """
-            The wait_set is C_E_P by now if all cores were busy and there were still sufficiently many jobs in the wait_set for all cores.
-            If the PP == A_m(previous state) then a PP certainly happened when all cores certainly became available,
-            so it means that there were not sufficient jobs in the wait_set to satisfy all cores.
-            Thus, we need to check whether the PP in this state was triggered by one of the cores which had no job to do.
-            """
-            if parent_state != None:
-                if parent_state.A[m - 1] == PP:
+                if all_possible_jobs_lower_priority_than_last_job == True:
                     E_P = P_E_P
-
-            """
-            At this point a PP certainly happened sometime in the past, but we don't know what jobs are certainly in the wait_set.
-            However, since a PP certainly happened then the last released job was the highest priority job in the wait_set.
-            So the job on the graph-edge that brought us to this current state, was certainly the highest priority job in the wait_set.
-            Then, from this state we cannot dispatch jobs with a higher priority than the one just dispatched, because they weren't added to the wait_set.
-            [Somehow explain why we use P_E_P when all jobs in P_E_P are lower priority than last dispatched job and
-             v_p(PP) == v_p'(PP) (i.e. the PP is unchanged)]
-            """
-            if parent_state != None:
-                if parent_state.PP != PP:
+            elif parent_state.PP == PP:
+                if PP == parent_state.A[0]:
                     all_possible_jobs_lower_priority_than_last_job = True
 
-                    for Jv in P_E_P:
-                        if JDICT[Jv]["p"] < JDICT[last_dispatched_job]["p"]:
+                    for v in P_E_P:
+                        if p[v] < p[last_dispatched_job]:
                             all_possible_jobs_lower_priority_than_last_job = False
 
                     if all_possible_jobs_lower_priority_than_last_job == True:
                         E_P = P_E_P
-                elif parent_state.PP == PP:
-                    if PP == parent_state.A[0]:
-                        all_possible_jobs_lower_priority_than_last_job = True
 
-                        for Jv in P_E_P:
-                            if JDICT[Jv]["p"] < JDICT[last_dispatched_job]["p"]:
-                                all_possible_jobs_lower_priority_than_last_job = False
-
-                        if all_possible_jobs_lower_priority_than_last_job == True:
-                            E_P = P_E_P
-
-        if parent_state != None:
-            if parent_state.PP == PP2 and PP2[0] == PP2[1]:
-                P_LP_E = set(
-                    [
-                        Jk
-                        for Jk in P_E_P
-                        if JDICT[Jk]["p"] > JDICT[last_dispatched_job]["p"]
-                    ]
-                )
-        ####################################
+    if parent_state != None:
+        if parent_state.PP == PP2 and PP2[0] == PP2[1]:
+            P_LP_E = set([k for k in P_E_P if p[k] > p[last_dispatched_job]])
+    ####################################
 
+    if debug:
+        last_job_name = names[last_dispatched_job] if parent_state != None else ""
         logger.debug(
-            f"Current state with A: {A}, PP:[{PP[0]}, {PP[1]}] and PP2: [{PP2[0]}, {PP2[1]}]; after dispatching {last_dispatched_job}."
+            f"Current state with A: {A}, PP:[{PP[0]}, {PP[1]}] and PP2: [{PP2[0]}, {PP2[1]}]; after dispatching {last_job_name}."
         )
         logger.debug(
-            f"We have E_P={E_P}, P_E_P={P_E_P}, C_E_P={C_E_P}, P_LP_E={P_LP_E}"
+            f"We have E_P={job_names(E_P)}, P_E_P={job_names(P_E_P)}, C_E_P={job_names(C_E_P)}, P_LP_E={job_names(P_LP_E)}"
         )
 
-        ############ ITERATE OVER JOBS ##############
-        for Ji in E_P:
-            r_min = JDICT[Ji]["r_min"]
-            r_max = JDICT[Ji]["r_max"]
-            C_min = JDICT[Ji]["C_min"]
-            C_max = JDICT[Ji]["C_max"]
-            p_i = JDICT[Ji]["p"]
-
-            ############ Define aux functions #############
-            def EFT_star(Jx):
-                if Jx in X:
-                    return FTI[Jx][0]  # EFT_x(v_p)
-                else:
-                    return BR[Jx]
-
-            def LFT_star(Jx):
-                if Jx in X:
-                    return FTI[Jx][1]  # LFT_x(v_p)
-                else:
-                    return WR[Jx]
-
-            def th(Jx):
-                rx_max = JDICT[Jx]["r_max"]
-                return max(
-                    rx_max,
-                    max(
-                        [LFT_star(Jy) for Jy in PRED[Jx].difference(PRED[Ji])],
-                        default=0,
-                    ),
-                )
+    ############ ITERATE OVER JOBS ##############
+    ############ Define aux functions #############
+    def EFT_star(x):
+        if x in FTI:
+            return FTI[x][0]  # EFT_x(v_p)
+        else:
+            return BR[x]
 
-            def R_min(Ja):
-                ra_min = JDICT[Ja]["r_min"]
-                return max(ra_min, max([EFT_star(Jy) for Jy in PRED[Ja]], default=0))
+    def LFT_star(x):
+        if x in FTI:
+            return FTI[x][1]  # LFT_x(v_p)
+        else:
+            return WR[x]
 
-            def R_max(Ja):
-                ra_max = JDICT[Ja]["r_max"]
-                return max(ra_max, max([LFT_star(Jy) for Jy in PRED[Ja]], default=0))
+    def R_min(a):
+        return max(r_min[a], max([EFT_star(y) for y in pred_sets[a]], default=0))
 
-            ############## END AUX FUNCTIONS #################
+    def R_max(a):
+        return max(r_max[a], max([LFT_star(y) for y in pred_sets[a]], default=0))
 
-            ESTi = max(R_min(Ji), A1_min)
-            LSTi = 0
+    # The jobs of C_E_P, E_P and P_LP_E are ready, so their predecessors are
+    # dispatched in v_p and their R_max does not change while iterating over E_P.
+    # Each set is sorted by priority the first time one of its jobs needs it.
+    priority_indices = dict()
 
-            if Ji not in P_LP_E:
-                if (PP[0] == PP[1]) and (Ji in C_E_P):
-                    t_wc = max(A1_max, min([R_max(Jb) for Jb in C_E_P], default=INF))
-                    t_high = min(
-                        [th(Jz) for Jz in C_E_P if JDICT[Jz]["p"] < p_i], default=INF
-                    )
-                else:
-                    t_wc = max(A1_max, min([R_max(Jb) for Jb in E_P], default=INF))
-                    t_high = min(
-                        [th(Jz) for Jz in E_P if JDICT[Jz]["p"] < p_i], default=INF
-                    )
-            else:
-                t_wc = max(A1_max, min([R_max(Jb) for Jb in P_LP_E], default=INF))
-                t_high = min(
-                    [th(Jz) for Jz in P_LP_E if JDICT[Jz]["p"] < p_i], default=INF
-                )
+    def by_priority(name, job_set):
+        if name not in priority_indices:
+            priority_indices[name] = PriorityIndex(job_set, p, pred_sets, R_max)
+        return priority_indices[name]
+
+    ############## END AUX FUNCTIONS #################
+
+    for i in E_P:
+
+        def th(x):
+            return max(
+                r_max[x],
+                max(
+                    [LFT_star(y) for y in pred_sets[x].difference(pred_sets[i])],
+                    default=0,
+                ),
+            )
 
-            LSTi = min(t_wc, t_high - 1)
-
-            if ESTi <= LSTi:
-                EFTi = ESTi + C_min
-                LFTi = LSTi + C_max
-                PA = [
-                    max(ESTi, A[idx][0]) for idx in range(1, m)
-                ]  # {max{ESTi, A_x_min} | 2 <= x <= m}
-                CA = [
-                    max(ESTi, A[idx][1]) for idx in range(1, m)
-                ]  # {max{ESTi, A_x_max} | 2 <= x <= m}
-
-                PA.append(EFTi)
-                CA.append(LFTi)
-
-                for Jc in X.intersection(PRED[Ji]):
-                    LFTc = FTI[Jc][1]
-                    if LSTi < LFTc and LFTc in CA:
-                        # TODO: Check if CA.index(LFTc) is correct here
-                        CA[CA.index(LFTc)] = LSTi
-
-                PA.sort()
-                CA.sort()
+        ESTi = max(R_min(i), A1_min)
+        LSTi = 0
+
+        if i not in P_LP_E:
+            if (PP[0] == PP[1]) and (i in C_E_P):
+                interfering = by_priority("C_E_P", C_E_P)
+            else:
+                interfering = by_priority("E_P", E_P)
+        else:
+            interfering = by_priority("P_LP_E", P_LP_E)
+
+        t_wc = max(A1_max, interfering.min_R_max(INF))
+        t_high = interfering.t_high(p[i], pred_sets[i], th, INF)
+
+        LSTi = min(t_wc, t_high - 1)
+
+        if ESTi <= LSTi:
+            EFTi = ESTi + C_min[i]
+            LFTi = LSTi + C_max[i]
+            PA = [
+                max(ESTi, A[idx][0]) for idx in range(1, m)
+            ]  # {max{ESTi, A_x_min} | 2 <= x <= m}
+            CA = [
+                max(ESTi, A[idx][1]) for idx in range(1, m)
+            ]  # {max{ESTi, A_x_max} | 2 <= x <= m}
+
+            PA.append(EFTi)
+            CA.append(LFTi)
+
+            for c in FTI.keys() & pred_sets[i]:
+                LFTc = FTI[c][1]
+                if LSTi < LFTc and LFTc in CA:
+                    # TODO: Check if CA.index(LFTc) is correct here
+                    CA[CA.index(LFTc)] = LSTi
+
+            PA.sort()
+            CA.sort()
+            if debug:
                 logger.debug(
-                    f"Dispatched {Ji} with ESTi = {ESTi} and LSTi = {LSTi}; EFTi = {EFTi} and LFTi = {LFTi}"
+                    f"Dispatched {names[i]} with ESTi = {ESTi} and LSTi = {LSTi}; EFTi = {EFTi} and LFTi = {LFTi}"
                 )
 
-                new_A = [(0, 0) for i in range(m)]
-                for i in range(m):
-                    new_A[i] = (PA[i], CA[i])
+            new_A = tuple(zip(PA, CA))
 
-                new_X = set()
-                for Jx in v_p.X:
-                    EFTx = v_p.FTI[Jx][0]
-                    if LSTi <= EFTx:
-                        new_X.add(Jx)
-                new_X.add(Ji)
+            new_XF = [(x, EFTx, LFTx) for x, EFTx, LFTx in v_p.XF if LSTi <= EFTx]
+            new_XF.append((i, EFTi, LFTi))
+            new_XF.sort()
 
-                new_FTI = dict()
-                for Jx in new_X:
-                    if Jx in v_p.FTI:
-                        new_FTI[Jx] = v_p.FTI[Jx]
-                new_FTI[Ji] = (EFTi, LFTi)
+            ############ ROS ##########
+            new_PP = PP
+            new_PP2 = (-1, -1)
+            # NOTE: Ji is not taken out of P_LP_E here (this used to be written as
+            # P_LP_E.difference(set[Ji]), which removes nothing), and the reference
+            # SAGs of the tests rely on it.
+            aux_E_P = E_P.difference({i}) if i not in P_LP_E else P_LP_E
 
-                ############ ROS ##########
+            if len(aux_E_P) > 0 and PP[0] == PP[1]:
                 new_PP = PP
-                new_PP2 = (-1, -1)
-                aux_E_P = (
-                    E_P.difference(set([Ji]))
-                    if Ji not in P_LP_E
-                    else P_LP_E.difference(set[Ji])
-                )
-                aux_R_P = R_P.difference(set([Ji]))
 
-                if len(aux_E_P) > 0 and PP[0] == PP[1]:
-                    new_PP = PP
+            if len(aux_E_P) > 0 and PP[0] != PP[1]:
+                new_PP = (ESTi, LSTi)
 
-                if len(aux_E_P) > 0 and PP[0] != PP[1]:
-                    new_PP = (ESTi, LSTi)
+            if len(aux_E_P) == 0:
+                # Release times of the jobs that stay ready, i.e. R_P without Ji
+                new_PRT = release.min_ready("r_min", c_min, ready, exclude=i)
+                new_CRT = release.min_ready("r_max", c_max, ready, exclude=i)
+                if new_PRT is None:  # This is here just for the end of the SAG
+                    new_PRT, new_CRT = new_A[0]
+                new_pp_min = max(new_PRT, new_A[0][0])
+                new_pp_max = max(new_CRT, new_A[0][1])
+                new_PP = (new_pp_min, new_pp_max)
 
-                if len(aux_E_P) == 0:
-                    new_PRT = (
-                        min([JDICT[Jw]["r_min"] for Jw in aux_R_P])
-                        if len(aux_R_P) > 0  # This is here just for the end of the SAG
-                        else new_A[0][0]
-                    )
-                    new_CRT = (
-                        min([JDICT[Jw]["r_max"] for Jw in aux_R_P])
-                        if len(aux_R_P) > 0  # This is here just for the end of the SAG
-                        else new_A[0][1]
-                    )
-                    new_pp_min = max(new_PRT, new_A[0][0])
-                    new_pp_max = max(new_CRT, new_A[0][1])
-                    new_PP = (new_pp_min, new_pp_max)
-
-                    aux_P_LP_E = set(
-                        [Jk for Jk in P_E_P if JDICT[Jk]["p"] > JDICT[Ji]["p"]]
-                    )
-                    if len(aux_P_LP_E) > 0:
-                        new_PP2 = PP
+                aux_P_LP_E = set([k for k in P_E_P if p[k] > p[i]])
+                if len(aux_P_LP_E) > 0:
+                    new_PP2 = PP
 
+            if debug:
                 logger.debug(
-                    f"After dispatching {Ji} after state with PP: {PP}; the C_E_P is {C_E_P}, the P_E_P is {P_E_P} and the E_P is {E_P} | The new PP is {new_PP} because |aux_E_P| = {len(aux_E_P)}"
+                    f"After dispatching {names[i]} after state with PP: {PP}; the C_E_P is {job_names(C_E_P)}, the P_E_P is {job_names(P_E_P)} and the E_P is {job_names(E_P)} | The new PP is {new_PP} because |aux_E_P| = {len(aux_E_P)}"
                 )
 
-                new_state = StateROS(new_A, new_X, new_FTI, new_PP, new_PP2, 0)
-                new_state_id = get_rand_node_id()
-                G.add_node(new_state_id, state=new_state)
-                G.add_edge(P[-1], new_state_id, job=Ji)
-                ###########################
-                BR[Ji] = min(EFTi - r_min, BR[Ji])
-                WR[Ji] = max(LFTi - r_max, WR[Ji])
-            else:
-                logger.debug(
-                    f"Cannot dispatch {Ji} after state with A: {A}, PP:[{PP[0]}, {PP[1]}] and PP2: [{PP2[0]}, {PP2[1]}], because ESTi={ESTi} > LSTi={LSTi}"
-                )
+            new_JP = v_p.JP | (1 << i)
+            new_state = StateROS(new_A, tuple(new_XF), new_PP, new_PP2, 0, new_JP)
+            successors.append((i, new_state, EFTi, LFTi))
+        elif debug:
+            logger.debug(
+                f"Cannot dispatch {names[i]} after state with A: {A}, PP:[{PP[0]}, {PP[1]}] and PP2: [{PP2[0]}, {PP2[1]}], because ESTi={ESTi} > LSTi={LSTi}"
+            )
+
+    return successors
 
-        # Next iteration
-        P = shortestPathFromSourceToLeaf(G)
-        bar.update(1)
 
+@sag_algorithm
+def ScheduleGraphConstructionAlgorithmROS(
+    J: set,
+    m: int,
+    JDICT: dict | JobTable,
+    PRED: dict,
+    logger=logging.Logger("SAGPY", logging.CRITICAL),
+    merge: bool = True,
+    prune_dominated: bool = False,
+    keep_graph: bool = True,
+    stop_on_deadline_miss: bool = False,
+    workers: int = 1,
+    exporter=None,
+) -> tuple["nx.DiGraph", dict, dict]:
+    """
+    The SAG is explored breadth-first, one level (i.e. number of dispatched jobs) at a time.
+    JDICT can be a dictionary of jobs or a JobTable. Internally, jobs are referred to by
+    their index in the job table.
+
+    Options:
+        merge       Merge the states that have the same set of dispatched jobs and
+                    compatible intervals, see StateROS.can_merge.
+        prune_dominated
+                    Without merge, drop the new states that a state of the next level
+                    that could be merged with them dominates (see StateROS.dominates
+                    and add_or_prune_state), and replace the states that a new state
+                    dominates. No interval is widened, so without precedence
+                    constraints BR/WR are those of merge=False, from fewer states.
+                    With precedence constraints, the release of a job depends on the
+                    response times found so far for its finished predecessors, so the
+                    bounds can differ from merge=False, as with merge. With merge,
+                    dominated states are merged anyway.
+        keep_graph  Return the whole SAG. Otherwise (response-times-only mode), no edges
+                    are stored and each level is dropped as soon as all its successors
+                    exist, so only BR/WR and the frontier are kept in memory, and None
+                    is returned instead of the graph.
+        stop_on_deadline_miss
+                    Check schedulability: as soon as the latest finish time of a job
+                    exceeds its (absolute) deadline d, stop and raise DeadlineMiss.
+                    Jobs without a deadline are never late.
+        workers     Number of processes that expand the states of each level (see
+                    sagpy.frontier.FrontierExpander). The new states are still added,
+                    merged and accounted for in BR/WR by this process, in the same order.
+        exporter    A sagpy.export.SAGExporter to which every state and edge is written
+                    as soon as the level of the state is complete.
+    """
+    bar = tqdm.tqdm(desc="[SAGPY-ROS] Progress")  # Progress bar
+    INF = 100000  # Representation of infinity
+    jobs = as_job_table(J, JDICT)
+    names = jobs.names
+    G = ScheduleGraph(keep_edges=keep_graph, exporter=exporter, job_names=names)
+    r_min, r_max, d = jobs.r_min, jobs.r_max, jobs.d
+    precedence = PrecedenceIndex(jobs, PRED)
+    pred_sets = precedence.preds
+    release = ReleaseIndex(jobs)
+    all_jobs = (1 << len(jobs)) - 1
+    # Response times, indexed by job index
+    BR = [INF for Ji in names]
+    WR = [0 for Ji in names]
+    InitNode = StateROS(tuple((0, 0) for core in range(m)), (), (0, 0), (0, 0), 0, 0)
+    G.add_node(InitNode)
+    # States of the level that is being expanded, with their ready jobs and countdown,
+    # their cursors into the release orders (see ReleaseIndex), their parent state, the
+    # job that was dispatched last and the path that leads to them when deadline misses
+    # are checked (see unwind_path). The merge groups hold the unexpanded states of
+    # the next level that are candidates for merging, grouped by their set of dispatched
+    # jobs. The expansion of a state also depends on its parent state and on the job
+    # that was dispatched last, so within a group only states that agree on those are
+    # merged.
+    level = [(0, *precedence.initial_ready(), (0, 0), None, None, None)]
+
+    context = (jobs, pred_sets, release, m, INF, logger)
+    predecessors = [y for y, succ in enumerate(precedence.successors) if len(succ) > 0]
+    with FrontierExpander(expand_state, context, workers, predecessors) as expander:
+        while len(level) > 0:
+            next_level = []
+            merge_groups = dict()
+
+            # States of this level cannot be merged anymore, but some were merged into
+            # others while the previous level was expanded.
+            level = [entry for entry in level if entry[0] in G]
+            expansions = expander.map(
+                [
+                    (
+                        G.states[node_id],
+                        ready,
+                        cursors,
+                        parent_state,
+                        last_dispatched_job,
+                    )
+                    for node_id, ready, _, cursors, parent_state, last_dispatched_job, _ in level
+                ],
+                BR,
+                WR,
+            )
+
+            for entry, successors in zip(level, expansions):
+                node_id, ready, waiting, cursors, _, _, path = entry
+                v_p = G.states[node_id]
+
+                for i, new_state, EFTi, LFTi in successors:
+                    new_JP = new_state.JP
+                    new_path = (i, path) if stop_on_deadline_miss else None
+                    if merge or prune_dominated:
+                        # Everything that the successor reads from its parent state
+                        parent_context = (i, v_p.PP, v_p.A[0], v_p.A[m - 1])
+                        group = merge_groups.setdefault(new_JP, dict()).setdefault(
+                            parent_context, []
+                        )
+                        if merge:
+                            new_state_id = add_or_merge_state(G, group, new_state)
+                        else:
+                            new_state_id = add_or_prune_state(G, group, new_state)
+                    else:
+                        new_state_id = G.add_node(new_state)
+                    G.add_edge(node_id, new_state_id, i)
+
+                    # A state that was merged into an existing one is already in the next level,
+                    # and a state in which all jobs are dispatched has nothing to expand.
+                    if G.in_degree[new_state_id] == 1 and new_JP != all_jobs:
+                        new_ready, new_waiting = precedence.after_dispatch(
+                            ready, waiting, i
+                        )
+                        new_cursors = release.skip_dispatched(cursors, new_JP)
+                        next_level.append(
+                            (
+                                new_state_id,
+                                new_ready,
+                                new_waiting,
+                                new_cursors,
+                                v_p,
+                                i,
+                                new_path,
+                            )
+                        )
+
+                    BR[i] = min(EFTi - r_min[i], BR[i])
+                    WR[i] = max(LFTi - r_max[i], WR[i])
+
+                    if stop_on_deadline_miss and LFTi > d[i]:
+                        bar.close()
+                        raise DeadlineMiss(
+                            names[i],
+                            [names[j] for j in unwind_path(new_path)],
+                            LFTi - d[i],
+                            {Ji: BR[j] for j, Ji in enumerate(names) if BR[j] != INF},
+                            {Ji: WR[j] for j, Ji in enumerate(names) if BR[j] != INF},
+                        )
+
+                bar.update(1)
+
+            G.flush()
+            if not keep_graph:
+                # All successors of this level exist, so its states are not needed anymore
+                for entry in level:
+                    G.remove_node(entry[0])
+            level = next_level
+
+    BR = {Ji: BR[i] for i, Ji in enumerate(names)}
+    WR = {Ji: WR[i] for i, Ji in enumerate(names)}
     logger.debug(f"BR: {BR}")
     logger.debug(f"WR: {WR}")
     bar.close()
 
-    return G, BR, WR
+    return G.to_networkx(names) if keep_graph else None, BR, WR
@@ -0,0 +1,291 @@
+import bisect
+from array import array
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+
+class ScheduleGraph:
+    """
+    Store for the SAG while it is being built.
+
+    Nodes get dense, sequential IDs starting at 0, so a node is an index into the state
+    list instead of a random key of a dictionary. Edges are kept as columns of integer
+    arrays: the parent, the child and the index of the dispatched job. The incoming
+    edges of each node form a linked list (first_in/next_in), so that they can be
+    redirected when states are merged.
+    The graph is only converted to a networkx.DiGraph when needed (see to_networkx).
+
+    Without edges (keep_edges=False), only the nodes that were not removed are kept,
+    in dictionaries instead of a list and an array, so that the memory follows the
+    number of live states rather than the number of states ever created.
+
+    With an exporter (see sagpy.export), the new nodes and edges are also passed to the
+    exporter by flush(), once their states cannot be merged anymore.
+
+    Attributes:
+        states          The state of each node ID (None, or no entry without edges,
+                        if the node was removed)
+        in_degree       For each live node ID, the number of incoming edges
+        edge_parent     For each edge, the node ID of its source
+        edge_child      For each edge, the node ID of its target
+        edge_job        For each edge, the index of the dispatched job
+    """
+
+    def __init__(self, keep_edges: bool = True, exporter=None, job_names: list = None):
+        """
+        If keep_edges is False, only the in-degree of the nodes is tracked and
+        the graph cannot be converted to networkx.
+        job_names are the job IDs of the job indices, for the exporter.
+        """
+        self.keep_edges = keep_edges
+        self.states = [] if keep_edges else dict()
+        self.in_degree = array("q") if keep_edges else dict()
+        self.first_in = array("q")
+        self.edge_parent = array("q")
+        self.edge_child = array("q")
+        self.edge_job = array("q")
+        self.next_in = array("q")
+        self.num_nodes = 0
+        self.next_id = 0
+        self.exporter = exporter
+        self.job_names = job_names
+        # Nodes and edges added since the last flush, and where the merged nodes went
+        self.new_nodes = []
+        self.new_edges = []
+        self.merged_into = dict()
+
+    def add_node(self, state) -> int:
+        """
+        Adds a node with the given state and returns its ID.
+        """
+        node_id = self.next_id
+        self.next_id += 1
+        self.num_nodes += 1
+        if self.exporter is not None:
+            self.new_nodes.append(node_id)
+
+        if not self.keep_edges:
+            self.states[node_id] = state
+            self.in_degree[node_id] = 0
+            return node_id
+
+        self.states.append(state)
+        self.in_degree.append(0)
+        self.first_in.append(-1)
+
+        return node_id
+
+    def add_edge(self, parent: int, child: int, job: int):
+        self.in_degree[child] += 1
+        if self.exporter is not None:
+            self.new_edges.append((parent, child, job))
+        if not self.keep_edges:
+            return
+
+        self.edge_parent.append(parent)
+        self.edge_child.append(child)
+        self.edge_job.append(job)
+        self.next_in.append(self.first_in[child])
+        self.first_in[child] = len(self.edge_child) - 1
+
+    def redirect_in_edges(self, old: int, new: int):
+        """
+        Makes the incoming edges of node old point to node new.
+        """
+        self.in_degree[new] += self.in_degree[old]
+        self.in_degree[old] = 0
+        if self.exporter is not None:
+            self.merged_into[old] = new
+        if not self.keep_edges:
+            return
+
+        edge = self.first_in[old]
+        if edge == -1:
+            return
+
+        while True:
+            self.edge_child[edge] = new
+            if self.next_in[edge] == -1:
+                break
+            edge = self.next_in[edge]
+
+        self.next_in[edge] = self.first_in[new]
+        self.first_in[new] = self.first_in[old]
+        self.first_in[old] = -1
+
+    def remove_node(self, node_id: int):
+        """
+        Drops the state of a node. Its edges are ignored from now on.
+        """
+        if node_id not in self:
+            return
+
+        self.num_nodes -= 1
+        if self.keep_edges:
+            self.states[node_id] = None
+        else:
+            del self.states[node_id]
+            del self.in_degree[node_id]
+
+    def flush(self):
+        """
+        Passes the nodes and edges added since the last flush to the exporter, if any.
+        Must only be called when these states cannot be merged anymore, e.g. when all
+        successors of a level exist. The merged nodes are skipped and their incoming
+        edges go to the node that they were merged into.
+        """
+        if self.exporter is None:
+            return
+
+        for node_id in self.new_nodes:
+            if node_id in self:
+                self.exporter.state(node_id, self.states[node_id], self.job_names)
+
+        for parent, child, job in self.new_edges:
+            while child in self.merged_into:
+                child = self.merged_into[child]
+            self.exporter.edge(parent, child, self.job_names[job])
+
+        self.new_nodes = []
+        self.new_edges = []
+        self.merged_into = dict()
+
+    def __contains__(self, node_id: int) -> bool:
+        if self.keep_edges:
+            return self.states[node_id] is not None
+        return node_id in self.states
+
+    def __len__(self):
+        return self.num_nodes
+
+    def to_networkx(self, job_names: list = None) -> "nx.DiGraph":
+        """
+        Returns the SAG as a networkx.DiGraph, where each node has a "state" attribute
+        and each edge a "job" attribute with the name (or index, if no names are given)
+        of the dispatched job.
+        """
+        if not self.keep_edges:
+            raise ValueError("The edges of this graph were not kept!")
+
+        import networkx as nx
+
+        G = nx.DiGraph()
+        G.add_nodes_from(
+            (node_id, {"state": state})
+            for node_id, state in enumerate(self.states)
+            if state is not None
+        )
+        for parent, child, job in zip(self.edge_parent, self.edge_child, self.edge_job):
+            if parent in self and child in self:
+                G.add_edge(
+                    parent, child, job=job if job_names is None else job_names[job]
+                )
+
+        return G
+
+
+def add_or_merge_state(graph: ScheduleGraph, group: list, state) -> int:
+    """
+    Adds a new state to the SAG, unless it can be merged with one of the states in group.
+
+    group is the list of node IDs of the states that have the same set of dispatched jobs
+    as the new state and that have not been expanded yet. A state that already has
+    successors cannot be widened anymore, hence it must never end up in a group.
+    The states must implement can_merge(other) and merge(other).
+
+    When the new state is merged into an existing node, the widened state can in its turn
+    overlap other states of the group, so these are merged into the same node as well.
+    Returns the ID of the node that represents the (possibly merged) state.
+    """
+    node_id = None
+
+    merged = True
+    while merged:
+        merged = False
+        for other_id in group:
+            if other_id == node_id:
+                continue
+
+            other_state = graph.states[other_id]
+            if not state.can_merge(other_state):
+                continue
+
+            state = state.merge(other_state)
+            if node_id is None:
+                node_id = other_id
+            else:
+                # A parent never has two children in the same group (it would have
+                # dispatched the same job twice), so no edge is duplicated.
+                graph.redirect_in_edges(other_id, node_id)
+                graph.remove_node(other_id)
+                group.remove(other_id)
+
+            merged = True
+            break
+
+    if node_id is None:
+        node_id = graph.add_node(state)
+        group.append(node_id)
+    else:
+        graph.states[node_id] = state
+
+    return node_id
+
+
+def add_or_prune_state(graph: ScheduleGraph, bucket: list, state) -> int:
+    """
+    Adds a new state to the SAG, unless a state of bucket dominates it, in which case the
+    ID of that state is returned instead. The states of bucket that the new state
+    dominates are replaced by it, with their incoming edges. The states must implement
+    dominates(other). Unlike add_or_merge_state, no state is widened.
+
+    bucket holds (A[0][0], node ID) of the states that could be merged with the new one
+    (see add_or_merge_state), sorted. A state can only dominate states whose first core
+    availability interval starts at the same time or later, so only the states before
+    the new one in that order are checked as dominating, and only the ones after it as
+    dominated.
+    """
+    key = state.A[0][0]
+    end = bisect.bisect_right(bucket, (key, float("inf")))
+    for other_key, other_id in bucket[:end]:
+        if graph.states[other_id].dominates(state):
+            return other_id
+
+    start = bisect.bisect_left(bucket, (key, -1))
+    dominated = [
+        entry for entry in bucket[start:] if state.dominates(graph.states[entry[1]])
+    ]
+    if len(dominated) == 0:
+        node_id = graph.add_node(state)
+        bisect.insort(bucket, (key, node_id))
+        return node_id
+
+    # The new state takes the place of the first dominated state
+    node_id = dominated[0][1]
+    graph.states[node_id] = state
+    for entry in dominated:
+        bucket.remove(entry)
+        if entry[1] != node_id:
+            graph.redirect_in_edges(entry[1], node_id)
+            graph.remove_node(entry[1])
+    bisect.insort(bucket, (key, node_id))
+
+    return node_id
+
+
+def unwind_path(path) -> list:
+    """
+    Returns the jobs on a path that is stored as nested (job, previous path) tuples,
+    with None as the empty path, from the first dispatched job to the last one.
+    Paths stored this way share their prefixes, so every state can keep its own path
+    at the cost of a single tuple.
+    """
+    jobs = []
+    while path is not None:
+        job, path = path
+        jobs.append(job)
+    jobs.reverse()
+
+    return jobs
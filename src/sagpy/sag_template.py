@@ -1,6 +1,57 @@
 import inspect
 import logging
-import networkx
+import typing
+from sagpy.jobs import JobTable
+
+if typing.TYPE_CHECKING:
+    import networkx
+
+
+class DeadlineMiss(Exception):
+    """
+    Raised by a SAG algorithm that checks schedulability when a job can miss its deadline.
+
+    Attributes:
+        job         The job ID of the job that can miss its deadline
+        path        The job IDs dispatched on a path of the SAG that leads to the miss,
+                    ending with job
+        lateness    By how much the latest finish time of job exceeds its deadline
+        BR          Best-case response times found before the exploration stopped
+        WR          Worst-case response times found before the exploration stopped
+    """
+
+    def __init__(self, job: str, path: list, lateness: int, BR: dict, WR: dict):
+        super().__init__(
+            f"Job {job} can miss its deadline by {lateness} after dispatching {path}"
+        )
+        self.job = job
+        self.path = path
+        self.lateness = lateness
+        self.BR = BR
+        self.WR = WR
+
+    def __reduce__(self):
+        # Rebuilt from its attributes when it is raised in a worker process
+        return (DeadlineMiss, (self.job, self.path, self.lateness, self.BR, self.WR))
+
+
+def returns_sag(annotation) -> bool:
+    """
+    Whether annotation is tuple[networkx.DiGraph, dict, dict]. networkx is only needed
+    to convert a SAG to a graph, so the graph type may also be given as a string (e.g.
+    tuple["nx.DiGraph", dict, dict]) by an algorithm that does not import networkx.
+    """
+    if typing.get_origin(annotation) is not tuple:
+        return False
+
+    graph, *results = typing.get_args(annotation)
+    if results != [dict, dict]:
+        return False
+
+    if isinstance(graph, str):
+        return graph in ("networkx.DiGraph", "nx.DiGraph")
+
+    return graph.__name__ == "DiGraph" and graph.__module__.startswith("networkx.")
 
 
 def sag_algorithm(func):
@@ -10,18 +61,23 @@ def sag_algorithm(func):
     """
 
     def wrapper(
-        J: set, m: int, JDICT: dict, PRED: dict, logger: logging.Logger
-    ) -> tuple[networkx.DiGraph, dict, dict]:
+        J: set,
+        m: int,
+        JDICT: dict | JobTable,
+        PRED: dict,
+        logger: logging.Logger,
+        **options,
+    ) -> tuple["networkx.DiGraph", dict, dict]:
         base_name = "SAG algorithm"
         sig = inspect.signature(func)
         params = sig.parameters
 
-        if list(params.keys()) != ["J", "m", "JDICT", "PRED", "logger"]:
+        if list(params.keys())[:5] != ["J", "m", "JDICT", "PRED", "logger"]:
             raise TypeError(
                 f"{base_name} must have the following parameters\
                     J: set,\n\
                     m: int,\n\
-                    JDICT: dict,\n\
+                    JDICT: dict | JobTable,\n\
                     PRED: dict[set],\n\
                     logger: logging.Logger"
             )
@@ -32,24 +88,33 @@ def sag_algorithm(func):
         if params["m"].annotation != int:
             raise TypeError(f"Parameter 'm' of {base_name} must be of type int!")
 
-        if params["JDICT"].annotation != dict:
-            raise TypeError(f"Parameter 'JDICT' of {base_name} must be of type dict!")
+        if params["JDICT"].annotation not in (dict, dict | JobTable):
+            raise TypeError(
+                f"Parameter 'JDICT' of {base_name} must be of type dict or dict | JobTable!"
+            )
 
         if params["PRED"].annotation != dict:
             raise TypeError(f"Parameter 'PRED' of {base_name} must be of type dict!")
 
+        # Any parameter after the logger is an option of the algorithm, so it must have a default value.
+        for name in list(params.keys())[5:]:
+            if params[name].default is inspect.Parameter.empty:
+                raise TypeError(
+                    f"Option '{name}' of {base_name} must have a default value!"
+                )
+
         # TODO: This is too strict (because it checks for an annotation). Fix it with a type check.
         # if params["logger"].annotation != logging.Logger:
         #     raise TypeError(
         #         f"Parameter 'logger' of {base_name} must be of type logging.Logger!"
         #     )
 
-        if sig.return_annotation != tuple[networkx.DiGraph, dict, dict]:
+        if not returns_sag(sig.return_annotation):
             raise TypeError(
                 f"{base_name} must return a tuple of type (networkx.DiGraph, dict, dict)"
             )
 
-        return func(J, m, JDICT, PRED, logger)
+        return func(J, m, JDICT, PRED, logger, **options)
 
     wrapper._is_sag_algorithm = True
     return wrapper
@@ -1,16 +1,61 @@
-import networkx as nx
-import matplotlib.pyplot as plt
 import argparse
 import csv
 import time
 import os
 import pickle
 import logging
+from typing import TYPE_CHECKING
 
-from sagpy.generate_jobs import generate_jobs
-from sagpy.drawio_diagram import generate_diagram
+from sagpy.generate_jobs import (
+    generate_job_table,
+    hyperperiod,
+    read_tasks,
+    release_ordered_jobs,
+    write_jobs_csv,
+)
 from sagpy.utils import *
+from sagpy.jobs import JobTable
 from sagpy.sag_algorithms import ALGORITHMS
+from sagpy.sag_template import DeadlineMiss
+from sagpy.export import EXPORTERS
+from sagpy.job_file import SUFFIX, load_job_file
+
+# networkx, matplotlib, drawpyo and the batch mode (with its process pool) are imported
+# where they are used, so that runs that do not need them start faster.
+if TYPE_CHECKING:
+    import networkx as nx
+
+
+def first_levels(G: "nx.DiGraph", levels: int) -> "nx.DiGraph":
+    """
+    Returns the subgraph of the SAG with the states that are reached from the initial
+    state by dispatching at most the given number of jobs.
+    """
+    import networkx as nx
+
+    roots = [node for node, degree in G.in_degree() if degree == 0]
+    depths = nx.multi_source_dijkstra_path_length(G, roots, cutoff=levels)
+
+    return G.subgraph(depths.keys())
+
+
+def save_png(G: "nx.DiGraph", fig_path: str):
+    """
+    Draws the SAG with the states and the dispatched jobs as labels, and saves it as PNG.
+    """
+    import networkx as nx
+    import matplotlib.pyplot as plt
+
+    # This assumes that every node has a field 'state'. TODO: This might not be the case, fix it or assert it!
+    node_labels = {node: f"{data['state']}" for node, data in G.nodes(data=True)}
+    edge_labels = {(u, v): f"{data['job']}" for u, v, data in G.edges(data=True)}
+    plt.figure(figsize=(30, 25))
+    pos = nx.nx_agraph.graphviz_layout(G, prog="dot", args="-Gnodesep=1 -Granksep=2")
+    nx.draw(G, pos, with_labels=False, node_color="lightblue", node_size=500)
+    nx.draw_networkx_labels(G, pos, labels=node_labels, font_size=10)
+    nx.draw_networkx_edge_labels(G, pos, edge_labels, font_size=8)
+    plt.savefig(fig_path, dpi=300, bbox_inches="tight")
+    plt.close()
 
 
 def main():
@@ -19,7 +64,9 @@ def main():
     parser.add_argument(
         "PATH_TO_CSV",
         help="The csv that contains a list of jobs.\
-              The csv follows the format specified on the official SAG repository.",
+              The csv follows the format specified on the official SAG repository.\
+              A binary job file (.sagjobs, see sagpy.job_file) is loaded without parsing instead.\
+              With --batch, a directory of such files or a manifest csv instead.",
         type=str,
     )
     parser.add_argument(
@@ -50,12 +97,33 @@ def main():
         type=str,
     )
     parser.add_argument(
-        "--pred", help="Path to csv with predecessor constraints", default="", type=str
+        "--pred",
+        help="Path to csv with predecessor constraints (not with --batch, where they are given with each job set)",
+        default="",
+        type=str,
     )
     parser.add_argument(
         "--cores",
-        help="Number of cores that the SAG algorithm should consider for analysis.",
-        default=2,
+        help="Number of cores that the SAG algorithm should consider for analysis.\
+              With --batch, several numbers of cores can be given; each job set is analyzed for each of them.",
+        default=[2],
+        nargs="+",
+        type=int,
+    )
+    parser.add_argument(
+        "--batch",
+        help="Set it to analyze many job sets at once. PATH_TO_CSV is then either a directory,\
+              where <name>_pred.csv holds the precedence constraints of <name>.csv, or a manifest csv\
+              with the path to a job set and optionally the path to its precedence constraints on each row.\
+              Only the response times are computed and they are aggregated in batch_summary.csv\
+              and batch_response_times.csv.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--workers",
+        help="Number of processes that analyze job sets in parallel with --batch (by default the number of CPUs),\
+              or that expand the states of each level of the SAG in parallel otherwise (by default 1).",
+        default=None,
         type=int,
     )
     parser.add_argument(
@@ -68,6 +136,49 @@ def main():
         help="Set it to save the SAG graph as a pickle file.",
         action="store_true",
     )
+    parser.add_argument(
+        "--response-times-only",
+        help="Set it to only compute the response times, without keeping the SAG in memory.\
+              Neither the pickle file nor the PNG of the SAG are generated.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--stop-on-deadline-miss",
+        help="Set it to check schedulability: the analysis stops as soon as a job can finish\
+              after its deadline, and reports that job, the path that leads to the miss and the lateness.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--export",
+        help="Set it to write the SAG to sag.<format> in the output folder while it is being explored.\
+              Unlike the pickle file, this also works with --response-times-only.",
+        choices=list(EXPORTERS.keys()),
+        default=None,
+    )
+    parser.add_argument(
+        "--no-png",
+        help="Set it to not draw the SAG as PNG.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--png-max-states",
+        help="The SAG is only drawn as PNG if it has at most this many states (after --png-levels).\
+              Drawing large SAGs takes long and uses a lot of memory. The default is 500.",
+        default=500,
+        type=int,
+    )
+    parser.add_argument(
+        "--png-levels",
+        help="Only draw the states that are reached by dispatching at most this many jobs.",
+        default=None,
+        type=int,
+    )
+    parser.add_argument(
+        "--tasks",
+        help="Set it to pass as input a csv with tasks instead of jobs.\
+              The jobs of one hyperperiod are analyzed, unless --tasks_end_time is set.",
+        action="store_true",
+    )
     parser.add_argument(
         "--tasks_end_time",
         help="If you want to pass as input a csv with tasks instead of jobs,\
@@ -75,6 +186,41 @@ def main():
         default=0,
         type=int,
     )
+    parser.add_argument(
+        "--save-jobs",
+        help="Set it to save the jobs generated from a csv with tasks as jobs.csv.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--job-feed",
+        help="Set it to add the jobs to the analysis as it reaches their release, instead of loading\
+              them all up front (ecrts2019 only, without --pred). The jobs csv must be sorted by r_min.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--busy-windows",
+        help="Set it to split the jobs into busy windows, at instants when all cores are certainly idle,\
+              and analyze each on its own, on --workers processes (ecrts2019 with --response-times-only).",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--until-repeat",
+        help="With --tasks, analyze the jobs until the schedule repeats from one hyperperiod to the next,\
+              but at most MAX_HYPERPERIODS (100 by default), instead of up to --tasks_end_time.\
+              It implies --job-feed.",
+        nargs="?",
+        const=100,
+        default=None,
+        type=int,
+        metavar="MAX_HYPERPERIODS",
+    )
+    parser.add_argument(
+        "--prune-dominated",
+        help="Set it to only drop the states that another state covers instead of merging states:\
+              without precedence constraints, the bounds are those of an exploration without merging,\
+              from fewer states.",
+        action="store_true",
+    )
     args = parser.parse_args()
 
     # Logger setup
@@ -103,40 +249,124 @@ def main():
         )
     os.makedirs(output_folder)
 
+    options = dict()  # Options that only some SAG algorithms have
+    if args.busy_windows == True:
+        options["busy_windows"] = True
+    if args.prune_dominated == True:
+        options["merge"] = False
+        options["prune_dominated"] = True
+
+    if args.batch == True:
+        if args.pred != "":
+            parser.error(
+                "--pred cannot be used with --batch: the precedence constraints of each job set are given next to it or in the manifest"
+            )
+        if args.busy_windows == True and args.algorithm != "ecrts2019":
+            parser.error("--busy-windows only works with the ecrts2019 algorithm")
+        workers = os.cpu_count() if args.workers is None else args.workers
+        from sagpy.batch import get_batch_inputs, run_batch, write_batch_results
+
+        inputs = get_batch_inputs(args.PATH_TO_CSV)
+        logger.info(
+            f"Running {args.algorithm} SAG algorithm on {len(inputs)} job sets and {args.cores} cores with {workers} workers..."
+        )
+        results = run_batch(
+            inputs,
+            args.algorithm,
+            args.cores,
+            workers,
+            args.stop_on_deadline_miss,
+            **options,
+        )
+        for path in write_batch_results(results, output_folder):
+            logger.info(f"Batch results saved at {path}!")
+        return
+
+    if len(args.cores) > 1:
+        parser.error("Several numbers of cores can only be given with --batch")
+
+    if args.until_repeat is not None:
+        if args.tasks == False or args.tasks_end_time > 0:
+            parser.error("--until-repeat needs --tasks and replaces --tasks_end_time")
+        args.job_feed = True
+
+    if args.job_feed == True and (
+        args.algorithm != "ecrts2019"
+        or args.pred != ""
+        or args.save_jobs == True
+        or args.PATH_TO_CSV.endswith(SUFFIX)
+    ):
+        parser.error(
+            "--job-feed only works with the ecrts2019 algorithm, a csv input, no --pred and no --save-jobs"
+        )
+
+    if args.busy_windows == True and (
+        args.algorithm != "ecrts2019"
+        or args.response_times_only == False
+        or args.export is not None
+        or args.job_feed == True
+    ):
+        parser.error(
+            "--busy-windows only works with the ecrts2019 algorithm and --response-times-only, without --export or --job-feed"
+        )
+
     # Inputs for SAG algorithms
     J = set()  # Set of jobs
     JDICT = dict()  # Dictionary of jobs which contains all info about each job
     PRED = dict()  # Dictionary that has the precedence constraints for each job
     m = int()  # Number of cores
 
-    if args.tasks_end_time > 0:
+    if args.tasks == True or args.tasks_end_time > 0:
         logger.info("Processing CSV with TASKS...")
-        jobs_csv_path = os.path.join(output_folder, "jobs.csv")
-        generate_jobs(args.PATH_TO_CSV, jobs_csv_path, args.tasks_end_time, True)
-        logger.info(f"Generated CSV with JOBS at {jobs_csv_path}!")
-        JDICT = get_job_dict(jobs_csv_path)
+        end_time = args.tasks_end_time
+        if args.until_repeat is not None:
+            tasks = read_tasks(args.PATH_TO_CSV)
+            H = hyperperiod(tasks)
+            end_time = args.until_repeat * H - 1
+            # With the first jobs released at 0, there are H/T jobs per task and hyperperiod
+            options["hyperperiod"] = (H, sum(H // T for _, T, _, _, _ in tasks))
+        elif end_time <= 0:
+            # The first jobs are released at 0, so the last ones of the hyperperiod before it ends
+            end_time = hyperperiod(read_tasks(args.PATH_TO_CSV)) - 1
+        if args.job_feed == True:
+            options["job_feed"] = release_ordered_jobs(args.PATH_TO_CSV, end_time, True)
+            JDICT = JobTable()
+            logger.info(
+                f"JOBS released until {end_time} are generated during the analysis!"
+            )
+        else:
+            JDICT = generate_job_table(args.PATH_TO_CSV, end_time, True)
+            logger.info(f"Generated {len(JDICT)} JOBS released until {end_time}!")
+
+        if args.save_jobs == True:
+            jobs_csv_path = os.path.join(output_folder, "jobs.csv")
+            write_jobs_csv(JDICT, jobs_csv_path)
+            logger.info(f"Generated CSV with JOBS at {jobs_csv_path}!")
 
         if args.drawio == True:
             drawio_path = os.path.join(output_folder, "tasks.drawio")
-            generate_diagram(args.PATH_TO_CSV, drawio_path, args.tasks_end_time)
+            from sagpy.drawio_diagram import generate_diagram
+
+            generate_diagram(args.PATH_TO_CSV, drawio_path, end_time)
             logger.info(f"Generated drawio file for TASKS at {drawio_path}!")
+    elif args.PATH_TO_CSV.endswith(SUFFIX):
+        logger.info("Loading binary job file...")
+        JDICT, PRED = load_job_file(args.PATH_TO_CSV)
+    elif args.job_feed == True:
+        logger.info("JOBS are read from the CSV during the analysis...")
+        options["job_feed"] = iter_jobs(args.PATH_TO_CSV)
+        JDICT = JobTable()
     else:
         logger.info("Processing CSV with JOBS...")
-        try:
-            JDICT = get_job_dict2(args.PATH_TO_CSV)
-        except:
-            JDICT = get_job_dict(args.PATH_TO_CSV)
+        JDICT = read_job_table(args.PATH_TO_CSV)
 
     list_of_jobs = JDICT.keys()
     J = set(list_of_jobs)
-    PRED = {j: set() for j in list_of_jobs}
-    m = args.cores
+    PRED = {j: PRED.get(j, set()) for j in list_of_jobs}
+    m = args.cores[0]
 
     if args.pred != "":
-        try:
-            aux_PRED = get_pred2(args.pred)
-        except:
-            aux_PRED = get_pred(args.pred)
+        aux_PRED = read_pred(args.pred)
 
         for k in aux_PRED.keys():
             PRED[k] = aux_PRED[k]
@@ -144,20 +374,53 @@ def main():
     # Run the SAG algorithm
     algorithm = ALGORITHMS.get(args.algorithm)
     logger.info(f"Running {args.algorithm} SAG algorithm...")
-    G, BR, WR = algorithm(J, m, JDICT, PRED, logger)
-    # This assumes that every node has a field 'state'. TODO: This might not be the case, fix it or assert it!
-    node_labels = {node: f"{data['state']}" for node, data in G.nodes(data=True)}
-    edge_labels = {(u, v): f"{data['job']}" for u, v, data in G.edges(data=True)}
+    exporter = None
+    if args.export is not None:
+        export_path = os.path.join(output_folder, f"sag.{args.export}")
+        exporter = EXPORTERS[args.export](export_path)
+    try:
+        G, BR, WR = algorithm(
+            J,
+            m,
+            JDICT,
+            PRED,
+            logger,
+            # The SAG is only needed to draw or to pickle it
+            keep_graph=not args.response_times_only
+            and (args.pickle == True or args.no_png == False),
+            stop_on_deadline_miss=args.stop_on_deadline_miss,
+            workers=1 if args.workers is None else args.workers,
+            exporter=exporter,
+            **options,
+        )
+    except DeadlineMiss as miss:
+        logger.error(
+            f"UNSCHEDULABLE: {miss.job} can miss its deadline by {miss.lateness} on the path {' -> '.join(miss.path)}"
+        )
+        return 1
+    finally:
+        if exporter is not None:
+            exporter.close()
+            logger.info(f"SAG exported at {export_path}!")
     logger.info(f"DONE!")
+    if args.stop_on_deadline_miss == True:
+        logger.info("SCHEDULABLE: no job can miss its deadline")
 
     # Write drawio file from job csv
     if args.drawio == True:
         drawio_path = os.path.join(output_folder, "jobs.drawio")
+        from sagpy.drawio_diagram import generate_diagram
+
         generate_diagram(args.PATH_TO_CSV, drawio_path)
         logger.info(f"Generated drawio file for JOBS at {drawio_path}!")
 
+    if args.pickle == True and G is None:
+        logger.warning(
+            "The SAG is not kept with --response-times-only, so it is not pickled!"
+        )
+
     # Save SAG as a pickle file
-    if args.pickle == True:
+    if args.pickle == True and G is not None:
         pickle_path = os.path.join(output_folder, "graph.pkl")
         with open(pickle_path, "wb+") as f:
             pickle.dump(G, f)
@@ -167,22 +430,36 @@ def main():
     csv_path = os.path.join(output_folder, "response_times.csv")
     csv_file = open(csv_path, "w+")
     writer = csv.writer(csv_file)
-    for j in list_of_jobs:
+    # With --job-feed, the jobs are only known after the analysis
+    for j in BR:
         row = [j, BR[j], WR[j]]
         writer.writerow(row)
     csv_file.close()
     logger.info(f"BCRT and WCRT saved at {csv_path}!")
 
+    if G is None:
+        return
+
     # Draw SAG and save to file
-    plt.figure(figsize=(30, 25))
-    pos = nx.nx_agraph.graphviz_layout(G, prog="dot", args="-Gnodesep=1 -Granksep=2")
-    nx.draw(G, pos, with_labels=False, node_color="lightblue", node_size=500)
-    nx.draw_networkx_labels(G, pos, labels=node_labels, font_size=10)
-    nx.draw_networkx_edge_labels(G, pos, edge_labels, font_size=8)
+    if args.no_png == True:
+        return
+
+    if args.png_levels is not None:
+        G = first_levels(G, args.png_levels)
+
+    if len(G) > args.png_max_states:
+        logger.warning(
+            f"The SAG is not saved as PNG because it has {len(G)} states (more than --png-max-states {args.png_max_states}). Use --png-levels to draw only its first levels."
+        )
+        return
+
     fig_path = os.path.join(output_folder, "sag.png")
-    logger.info(f"Saving SAG as PNG...")
-    plt.savefig(fig_path, dpi=300, bbox_inches="tight")
-    logger.info(f"SAG figure saved at {fig_path}!")
+    logger.info(f"Saving SAG with {len(G)} states as PNG...")
+    start = time.perf_counter()
+    save_png(G, fig_path)
+    logger.info(
+        f"SAG figure saved at {fig_path} in {time.perf_counter() - start:.2f} seconds!"
+    )
 
 
 if __name__ == "__main__":
@@ -1,5 +1,27 @@
 import csv
 import os
+from array import array
+from itertools import chain, repeat
+
+from sagpy.jobs import JobTable, NO_DEADLINE
+
+# Headers of the csv formats read by get_job_dict2 and get_pred2 (lowercase)
+JOB_SET_HEADER = [
+    "task id",
+    "job id",
+    "arrival min",
+    "arrival max",
+    "cost min",
+    "cost max",
+    "deadline",
+    "priority",
+]
+PRED_SET_HEADER = [
+    "predecessor tid",
+    "predecessor jid",
+    "successor tid",
+    "successor jid",
+]
 
 
 def get_job_dict(path):
@@ -14,20 +36,20 @@ def get_job_dict(path):
     C_max = worst-case execution time (WCET)
     p = priority (which must be unique)
     """
-    csv_file = open(path, "r")
-    reader = csv.reader(csv_file, delimiter=",")
     result = {}
-    for row in reader:
-        key = row[0].strip()  # Get the first column as the key (e.g., "J15")
-        values = {
-            "r_min": int(row[1]),
-            "r_max": int(row[2]),
-            "C_min": int(row[3]),
-            "C_max": int(row[4]),
-            "p": int(row[5]),
-        }
-
-        result[key] = values
+    with open(path, "r") as csv_file:
+        reader = csv.reader(csv_file, delimiter=",")
+        for row in reader:
+            key = row[0].strip()  # Get the first column as the key (e.g., "J15")
+            values = {
+                "r_min": int(row[1]),
+                "r_max": int(row[2]),
+                "C_min": int(row[3]),
+                "C_max": int(row[4]),
+                "p": int(row[5]),
+            }
+
+            result[key] = values
 
     return result
 
@@ -48,26 +70,26 @@ def get_job_dict2(path) -> dict:
     """
     assert is_job_set_csv(path) == True
 
-    csv_file = open(path, "r")
-    reader = csv.reader(csv_file, delimiter=",")
     result = {}
-    first_row = next(reader)
-
-    for row in reader:
-        task = row[0].strip()
-        job = row[1].strip()
-        key = f"J{task}_{job}"
-
-        values = {
-            "r_min": int(row[2]),
-            "r_max": int(row[3]),
-            "C_min": int(row[4]),
-            "C_max": int(row[5]),
-            "d": int(row[6]),
-            "p": int(row[7]),
-        }
-
-        result[key] = values
+    with open(path, "r") as csv_file:
+        reader = csv.reader(csv_file, delimiter=",")
+        first_row = next(reader)
+
+        for row in reader:
+            task = row[0].strip()
+            job = row[1].strip()
+            key = f"J{task}_{job}"
+
+            values = {
+                "r_min": int(row[2]),
+                "r_max": int(row[3]),
+                "C_min": int(row[4]),
+                "C_max": int(row[5]),
+                "d": int(row[6]),
+                "p": int(row[7]),
+            }
+
+            result[key] = values
 
     return result
 
@@ -81,16 +103,16 @@ def get_pred(path):
     Ja_b, Jc_d, etc = jobs that are in the set of all jobs on which Ji_j depends
     """
     PRED = dict()
-    csv_file = open(path, "r")
-    reader = csv.reader(csv_file, delimiter=",")
-    # first_row = next(reader)
+    with open(path, "r") as csv_file:
+        reader = csv.reader(csv_file, delimiter=",")
+        # first_row = next(reader)
 
-    for row in reader:
-        key = row[0].strip()  # Get the first column as the key (e.g., "J15")
-        values = set(
-            map(str, row[1:])
-        )  # Convert the remaining columns to strings and make a tuple
-        PRED[key] = values
+        for row in reader:
+            key = row[0].strip()  # Get the first column as the key (e.g., "J15")
+            values = set(
+                [Jy.strip() for Jy in row[1:] if Jy.strip() != ""]
+            )  # The remaining columns are the predecessors, e.g. "J1_1, J2_1" or a trailing comma
+            PRED[key] = values
 
     return PRED
 
@@ -107,22 +129,22 @@ def get_pred2(path) -> dict:
     assert is_pred_set_csv(path) == True
 
     PRED = dict()
-    csv_file = open(path, "r")
-    reader = csv.reader(csv_file, delimiter=",")
-    first_row = next(reader)
-
-    for row in reader:
-        task_pred = row[0].strip()
-        job_pred = row[1].strip()
-        task_succ = row[2].strip()
-        job_succ = row[3].strip()
-        key = f"J{task_succ}_{job_succ}"
-        value = f"J{task_pred}_{job_pred}"
-
-        if key in PRED:
-            PRED[key].add(value)
-        else:
-            PRED[key] = set([value])
+    with open(path, "r") as csv_file:
+        reader = csv.reader(csv_file, delimiter=",")
+        first_row = next(reader)
+
+        for row in reader:
+            task_pred = row[0].strip()
+            job_pred = row[1].strip()
+            task_succ = row[2].strip()
+            job_succ = row[3].strip()
+            key = f"J{task_succ}_{job_succ}"
+            value = f"J{task_pred}_{job_pred}"
+
+            if key in PRED:
+                PRED[key].add(value)
+            else:
+                PRED[key] = set([value])
 
     return PRED
 
@@ -135,42 +157,33 @@ def is_job_set_csv(path: str) -> bool:
     if os.path.isfile(path) == False:
         raise ValueError("The given path doesn't exist!")
 
-    file = open(path)
-    reader = csv.reader(file, delimiter=",")
-    job_ids = list()
-    first_row = next(reader)
-    first_row = [s.strip().lower() for s in first_row]
-
-    if first_row != [
-        "task id",
-        "job id",
-        "arrival min",
-        "arrival max",
-        "cost min",
-        "cost max",
-        "deadline",
-        "priority",
-    ]:
-        raise ValueError(
-            "First column is incorrect! It should be (case insensitive):\
-                [Task ID, Job ID, Arrival min, Arrival max, Cost min, Cost max, Deadline, Priority]"
-        )
-
-    for index, row in enumerate(reader):
-        if len(row) != 8:
+    with open(path) as file:
+        reader = csv.reader(file, delimiter=",")
+        job_ids = list()
+        first_row = next(reader)
+        first_row = [s.strip().lower() for s in first_row]
+
+        if first_row != JOB_SET_HEADER:
             raise ValueError(
-                f"Row {index} has {len(row)} columns instead of 8! In csv file at {path}"
+                "First column is incorrect! It should be (case insensitive):\
+                    [Task ID, Job ID, Arrival min, Arrival max, Cost min, Cost max, Deadline, Priority]"
             )
 
-        for val in row:
-            try:
-                int(val)
-            except ValueError:
+        for index, row in enumerate(reader):
+            if len(row) != 8:
                 raise ValueError(
-                    f"Row {index}'s values cannot be converted to int! In csv file at {path}"
+                    f"Row {index} has {len(row)} columns instead of 8! In csv file at {path}"
                 )
 
-        job_ids.append(int(row[1]))
+            for val in row:
+                try:
+                    int(val)
+                except ValueError:
+                    raise ValueError(
+                        f"Row {index}'s values cannot be converted to int! In csv file at {path}"
+                    )
+
+            job_ids.append(int(row[1]))
 
     if len(job_ids) != len(set(job_ids)):
         raise ValueError(f"There are jobs with the same ID in the csv file at {path}")
@@ -186,34 +199,233 @@ def is_pred_set_csv(path: str) -> bool:
     if os.path.isfile(path) == False:
         raise ValueError("The given path doesn't exist!")
 
-    file = open(path)
-    reader = csv.reader(file, delimiter=",")
-    first_row = next(reader)
-    first_row = [s.strip().lower() for s in first_row]
-
-    if first_row != [
-        "predecessor tid",
-        "predecessor jid",
-        "successor tid",
-        "successor jid",
-    ]:
-        raise ValueError(
-            "First column is incorrect! It should be (case insensitive):\
-                [predecessor tid, predecessor jid, successor tid, successor jid]"
-        )
-
-    for index, row in enumerate(reader):
-        if len(row) != 4:
+    with open(path) as file:
+        reader = csv.reader(file, delimiter=",")
+        first_row = next(reader)
+        first_row = [s.strip().lower() for s in first_row]
+
+        if first_row != PRED_SET_HEADER:
             raise ValueError(
-                f"Row {index} has {len(row)} columns instead of 4! In csv file at {path}"
+                "First column is incorrect! It should be (case insensitive):\
+                    [predecessor tid, predecessor jid, successor tid, successor jid]"
             )
 
-        for val in row:
+        for index, row in enumerate(reader):
+            if len(row) != 4:
+                raise ValueError(
+                    f"Row {index} has {len(row)} columns instead of 4! In csv file at {path}"
+                )
+
+            for val in row:
+                try:
+                    int(val)
+                except ValueError:
+                    raise ValueError(
+                        f"Row {index}'s values cannot be converted to int! In csv file at {path}"
+                    )
+
+    return True
+
+
+def _split_chunk(lines: list, num_columns: int, first_line: int, path: str) -> tuple:
+    """
+    Splits a chunk of lines of a csv file into columns of strings.
+    Returns the columns and the line number of each row.
+
+    Plain chunks (num_columns values on every line, no quotes) are split with str.split,
+    without a list per row. Other chunks are parsed with csv.reader, which skips empty
+    lines and finds the first line with a wrong number of columns.
+    """
+    separators = num_columns - 1
+    text = "".join(lines)
+    if '"' not in text and all(line.count(",") == separators for line in lines):
+        fields = text.replace("\n", ",").split(",")
+        if text.endswith("\n"):
+            fields.pop()
+        columns = [fields[k::num_columns] for k in range(num_columns)]
+        return columns, range(first_line, first_line + len(lines))
+
+    rows = []
+    row_lines = []
+    reader = csv.reader(lines, delimiter=",")
+    for row in reader:
+        line = first_line + reader.line_num - 1
+        if len(row) != num_columns:
+            if any(val.strip() for val in row):
+                raise ValueError(
+                    f"Line {line} has {len(row)} columns instead of {num_columns}! In csv file at {path}"
+                )
+            continue
+        rows.append(row)
+        row_lines.append(line)
+
+    return list(zip(*rows)) if rows else [[] for _ in range(num_columns)], row_lines
+
+
+def _int_column(values: list, lines: list, path: str) -> array:
+    """
+    Converts a column of a chunk of csv rows to integers, or raises a ValueError with
+    the line number of the first value that is not an integer.
+    """
+    try:
+        return array("q", map(int, values))
+    except ValueError:
+        for line, val in zip(lines, values):
             try:
                 int(val)
             except ValueError:
                 raise ValueError(
-                    f"Row {index}'s values cannot be converted to int! In csv file at {path}"
+                    f"Line {line}'s values cannot be converted to int! In csv file at {path}"
+                ) from None
+        raise
+
+
+def read_job_table(path: str, chunk_size: int = 1 << 20) -> JobTable:
+    """
+    Reads a job set csv in a single pass and returns it as a JobTable. The format is
+    detected from the first line:
+    - with the header of get_job_dict2:
+      task id, job id, r_min, r_max, C_min, C_max, d, p
+    - without a header, as read by get_job_dict: Ji_j, r_min, r_max, C_min, C_max, p
+
+    The file is read in chunks of about chunk_size characters, and each chunk is parsed
+    one column at a time and validated at the same time (number of columns, integer
+    values and unique job IDs, like is_job_set_csv). The first invalid row is reported
+    in a ValueError with its line number. Empty lines are skipped.
+    """
+    jobs = JobTable()
+    job_ids = set()
+
+    with open(path, "r", newline="") as csv_file:
+        first_line = csv_file.readline()
+        first_row = next(csv.reader([first_line]), [])
+        with_header = [s.strip().lower() for s in first_row] == JOB_SET_HEADER
+        num_columns = 8 if with_header else 6
+        first_column = 2 if with_header else 1  # Column of r_min
+        line = 1 if with_header else 0  # Lines before the chunk
+        chunk = [] if with_header else [first_line]
+
+        while chunk := chunk + csv_file.readlines(chunk_size):
+            columns, lines = _split_chunk(chunk, num_columns, line + 1, path)
+            line += len(chunk)
+            chunk = []
+            if len(lines) == 0:
+                continue
+
+            values = {
+                name: _int_column(columns[first_column + k], lines, path)
+                for k, name in enumerate(("r_min", "r_max", "C_min", "C_max"))
+            }
+            if with_header:
+                _int_column(columns[0], lines, path)  # Task IDs
+                values["d"] = _int_column(columns[6], lines, path)
+                values["p"] = _int_column(columns[7], lines, path)
+                ids = _int_column(columns[1], lines, path)
+                names = [
+                    f"J{t.strip()}_{j.strip()}" for t, j in zip(columns[0], columns[1])
+                ]
+            else:
+                values["d"] = repeat(NO_DEADLINE, len(lines))
+                values["p"] = _int_column(columns[5], lines, path)
+                ids = names = [name.strip() for name in columns[0]]
+
+            if not job_ids.isdisjoint(ids) or len(set(ids)) != len(ids):
+                for row_line, job_id in zip(lines, ids):
+                    if job_id in job_ids:
+                        raise ValueError(
+                            f"Line {row_line} has the same job ID as a previous line! In csv file at {path}"
+                        )
+                    job_ids.add(job_id)
+            job_ids.update(ids)
+
+            jobs.extend(names, values)
+
+    return jobs
+
+
+def iter_jobs(path: str):
+    """
+    Yields the jobs of a job set csv (in either format, see read_job_table) one at a
+    time, as (name, r_min, r_max, C_min, C_max, d, p) tuples for jobs.JobFeed, so that
+    the file is only read as far as the analysis needs. Invalid rows are reported with
+    their line number when they are reached.
+    """
+    with open(path, "r", newline="") as csv_file:
+        reader = csv.reader(csv_file, delimiter=",")
+        first_row = next(reader, [])
+        with_header = [s.strip().lower() for s in first_row] == JOB_SET_HEADER
+        num_columns = 8 if with_header else 6
+        rows = reader if with_header else chain([first_row], reader)
+
+        for row in rows:
+            line = reader.line_num
+            if len(row) != num_columns:
+                if any(val.strip() for val in row):
+                    raise ValueError(
+                        f"Line {line} has {len(row)} columns instead of {num_columns}! In csv file at {path}"
+                    )
+                continue
+
+            try:
+                if with_header:
+                    task, job, r_min, r_max, C_min, C_max, d, p = map(int, row)
+                    name = f"J{row[0].strip()}_{row[1].strip()}"
+                else:
+                    r_min, r_max, C_min, C_max, p = map(int, row[1:])
+                    name, d = row[0].strip(), NO_DEADLINE
+            except ValueError:
+                raise ValueError(
+                    f"Line {line}'s values cannot be converted to int! In csv file at {path}"
+                ) from None
+
+            yield name, r_min, r_max, C_min, C_max, d, p
+
+
+def read_pred(path: str) -> dict:
+    """
+    Reads a predecessor csv in a single pass. The format is detected from the first
+    line:
+    - with the header of get_pred2: one precedence constraint (edge) per line
+    - without a header, as read by get_pred: a job followed by all its predecessors
+
+    Returns PRED as get_pred/get_pred2, i.e. the set of predecessors of each job.
+    The first invalid row is reported in a ValueError with its line number.
+    """
+    PRED = dict()
+
+    with open(path, "r", newline="") as csv_file:
+        reader = csv.reader(csv_file, delimiter=",")
+        first_row = next(reader, [])
+        with_header = [s.strip().lower() for s in first_row] == PRED_SET_HEADER
+        rows = reader if with_header else chain([first_row], reader)
+
+        for row in rows:
+            line = reader.line_num
+            row = [val.strip() for val in row]
+            if not any(row):
+                continue
+
+            if not with_header:
+                # The remaining columns are the predecessors, e.g. "J1_1, J2_1" or a
+                # trailing comma
+                PRED[row[0]] = set(Jy for Jy in row[1:] if Jy != "")
+                continue
+
+            if len(row) != 4:
+                raise ValueError(
+                    f"Line {line} has {len(row)} columns instead of 4! In csv file at {path}"
                 )
+            try:
+                for val in row:
+                    int(val)
+            except ValueError:
+                raise ValueError(
+                    f"Line {line}'s values cannot be converted to int! In csv file at {path}"
+                ) from None
 
-    return True
+            task_pred, job_pred, task_succ, job_succ = row
+            PRED.setdefault(f"J{task_succ}_{job_succ}", set()).add(
+                f"J{task_pred}_{job_pred}"
+            )
+
+    return PRED
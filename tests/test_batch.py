@@ -0,0 +1,76 @@
+import os
+
+from sagpy.batch import get_batch_inputs, run_batch, write_batch_results
+
+THIS_DIR = os.path.dirname(__file__)
+EXAMPLES_DIR = os.path.join(THIS_DIR, "..", "examples")
+
+
+def test_manifest_with_relative_paths(tmp_path):
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text(
+        f"{EXAMPLES_DIR}/job_sets/basic_pred_constraints_setup.csv, {EXAMPLES_DIR}/pred_sets/pred_constraints.csv\n"
+        "\n"
+        "jobs.csv\n"
+    )
+
+    assert get_batch_inputs(str(manifest)) == [
+        (
+            f"{EXAMPLES_DIR}/job_sets/basic_pred_constraints_setup.csv",
+            f"{EXAMPLES_DIR}/pred_sets/pred_constraints.csv",
+        ),
+        (str(tmp_path / "jobs.csv"), ""),
+    ]
+
+
+def test_batch_on_a_pool_matches_one_process(tmp_path):
+    """
+    The results do not depend on the number of workers, and a missing job set
+    is reported as an error without stopping the batch.
+    """
+    inputs = get_batch_inputs(os.path.join(EXAMPLES_DIR, "job_sets"))
+    inputs.append((str(tmp_path / "missing.csv"), ""))
+
+    serial = run_batch(inputs, "ros", [1, 2], workers=1)
+    parallel = run_batch(inputs, "ros", [1, 2], workers=2)
+
+    for row in serial + parallel:
+        row.pop("seconds")
+    assert serial == parallel
+    assert len(serial) == 2 * len(inputs)
+    assert [row["status"] for row in serial[-2:]] == ["error", "error"]
+
+    summary_path, response_times_path = write_batch_results(serial, str(tmp_path))
+    with open(summary_path) as summary:
+        assert len(summary.readlines()) == len(serial) + 1
+    with open(response_times_path) as response_times:
+        assert len(response_times.readlines()) == 1 + sum(
+            len(row["WR"]) for row in serial
+        )
+
+
+def test_batch_passes_options_to_the_algorithm():
+    """
+    Pruning dominated states and busy windows keep the response times of every job set,
+    and an option that the algorithm does not have is reported as an error.
+    """
+    inputs = get_batch_inputs(os.path.join(EXAMPLES_DIR, "job_sets"))
+
+    default = run_batch(inputs, "ecrts2019", [1, 2])
+    options = run_batch(
+        inputs,
+        "ecrts2019",
+        [1, 2],
+        merge=False,
+        prune_dominated=True,
+        busy_windows=True,
+    )
+
+    assert [row["status"] for row in options] == ["done"] * len(default)
+    assert [(row["BR"], row["WR"]) for row in options] == [
+        (row["BR"], row["WR"]) for row in default
+    ]
+
+    rows = run_batch(inputs[:1], "ros", [2], busy_windows=True)
+    assert rows[0]["status"] == "error"
+    assert "busy_windows" in rows[0]["details"]
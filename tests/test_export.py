@@ -0,0 +1,104 @@
+import os
+import re
+import json
+import logging
+import xml.dom.minidom
+
+import pytest
+
+from sagpy.batch import read_inputs
+from sagpy.export import EXPORTERS
+from sagpy.sag_algorithms.ecrts2019 import ScheduleGraphConstructionAlgorithm
+from sagpy.sag_algorithms.ros import ScheduleGraphConstructionAlgorithmROS
+
+THIS_DIR = os.path.dirname(__file__)
+EXAMPLES_DIR = os.path.join(THIS_DIR, "..", "examples")
+
+
+def export(algorithm, exporter, path, keep_graph):
+    J, JDICT, PRED = read_inputs(
+        f"{EXAMPLES_DIR}/job_sets/basic_pred_constraints_setup.csv",
+        f"{EXAMPLES_DIR}/pred_sets/pred_constraints.csv",
+    )
+    with EXPORTERS[exporter](path) as sag_exporter:
+        G = algorithm(
+            J,
+            2,
+            JDICT,
+            PRED,
+            logging.Logger("SAGPY", logging.CRITICAL),
+            keep_graph=keep_graph,
+            exporter=sag_exporter,
+        )[0]
+
+    return G
+
+
+@pytest.mark.parametrize(
+    "algorithm",
+    [ScheduleGraphConstructionAlgorithm, ScheduleGraphConstructionAlgorithmROS],
+)
+def test_jsonl_export_matches_sag(algorithm, tmp_path):
+    """
+    The exported states and edges are the ones of the SAG after merging, whether or
+    not the SAG is kept in memory.
+    """
+    G = export(algorithm, "jsonl", tmp_path / "sag.jsonl", keep_graph=True)
+    export(algorithm, "jsonl", tmp_path / "streamed.jsonl", keep_graph=False)
+
+    with open(tmp_path / "sag.jsonl") as file:
+        records = [json.loads(line) for line in file]
+    with open(tmp_path / "streamed.jsonl") as file:
+        assert [json.loads(line) for line in file] == records
+
+    states = {r["state"]: r for r in records if "state" in r}
+    edges = sorted((*r["edge"], r["job"]) for r in records if "edge" in r)
+    assert set(states) == set(G.nodes)
+    assert edges == sorted(G.edges(data="job"))
+    for node_id, state in G.nodes(data="state"):
+        assert states[node_id]["A"] == [list(interval) for interval in state.A]
+
+
+@pytest.mark.parametrize("exporter", ["dot", "graphml"])
+def test_other_formats_are_complete(exporter, tmp_path):
+    path = tmp_path / f"sag.{exporter}"
+    G = export(ScheduleGraphConstructionAlgorithmROS, exporter, path, keep_graph=True)
+
+    text = path.read_text()
+    assert text.count(" -> " if exporter == "dot" else "<edge ") == len(G.edges)
+    assert text.rstrip().endswith("}" if exporter == "dot" else "</graphml>")
+    if exporter == "graphml":
+        xml.dom.minidom.parseString(text)
+
+
+@pytest.mark.parametrize(
+    "algorithm",
+    [ScheduleGraphConstructionAlgorithm, ScheduleGraphConstructionAlgorithmROS],
+)
+def test_all_formats_have_the_same_state_fields(algorithm, tmp_path):
+    for exporter in EXPORTERS:
+        export(algorithm, exporter, tmp_path / f"sag.{exporter}", keep_graph=False)
+
+    with open(tmp_path / "sag.jsonl") as file:
+        states = [json.loads(line) for line in file]
+    states = {r.pop("state"): r for r in states if "state" in r}
+
+    dot = dict()
+    for match in re.finditer(
+        r"^  (\d+) \[label=(.*)\];$", (tmp_path / "sag.dot").read_text(), re.M
+    ):
+        lines = json.loads(match[2]).split("\n")
+        dot[int(match[1])] = {
+            name: json.loads(value)
+            for name, value in (line.split(": ", 1) for line in lines)
+        }
+
+    graphml = dict()
+    document = xml.dom.minidom.parse(str(tmp_path / "sag.graphml"))
+    for node in document.getElementsByTagName("node"):
+        data = node.getElementsByTagName("data")[0].firstChild.data
+        graphml[int(node.getAttribute("id")[1:])] = json.loads(data)
+
+    assert dot == graphml == states
+    if algorithm is ScheduleGraphConstructionAlgorithmROS:
+        assert all("PP" in fields for fields in states.values())
@@ -0,0 +1,37 @@
+import os
+
+from sagpy.generate_jobs import generate_job_table, generate_jobs
+from sagpy.jobs import NO_DEADLINE
+
+THIS_DIR = os.path.dirname(__file__)
+TASKS_PATH = os.path.join(THIS_DIR, "..", "examples", "task_sets", "tasks.csv")
+
+
+def test_one_hyperperiod_by_default():
+    """
+    The periods are 5, 10, 14, 11 and 10, so the hyperperiod is 770.
+    """
+    jobs = generate_job_table(TASKS_PATH, allow_instant_start=True)
+
+    assert len(jobs) == 770 // 5 + 770 // 10 + 770 // 14 + 770 // 11 + 770 // 10
+    assert max(jobs.r_min) == 770 - 5
+    assert jobs["J3_2"] == {
+        "r_min": 14,
+        "r_max": 14,
+        "C_min": 2,
+        "C_max": 3,
+        "d": NO_DEADLINE,
+        "p": 770 // 5 + 770 // 10 + 2,
+    }
+
+
+def test_csv_output(tmp_path):
+    path = tmp_path / "jobs.csv"
+    generate_jobs(TASKS_PATH, str(path), 10)
+
+    assert path.read_text().splitlines() == [
+        "J1_1,5,5,2,3,1",
+        "J1_2,10,10,2,3,2",
+        "J2_1,10,10,3,4,3",
+        "J5_1,10,10,4,5,4",
+    ]
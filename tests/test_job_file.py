@@ -0,0 +1,44 @@
+import os
+import pickle
+import logging
+
+import pytest
+
+from sagpy.batch import read_inputs
+from sagpy.job_file import convert_csv, load_job_file
+from sagpy.sag_algorithms.ros import ScheduleGraphConstructionAlgorithmROS
+
+THIS_DIR = os.path.dirname(__file__)
+JOBS_PATH = f"{THIS_DIR}/tests_sag_ros/test4/jobs.csv"
+PRED_PATH = f"{THIS_DIR}/tests_sag_ros/test4/pred.csv"
+
+
+def test_job_file_matches_csv(tmp_path):
+    path = str(tmp_path / "jobs.sagjobs")
+    convert_csv(JOBS_PATH, path, PRED_PATH)
+
+    J, JDICT, PRED = read_inputs(JOBS_PATH, PRED_PATH)
+    jobs, loaded_PRED = load_job_file(path)
+
+    assert jobs.names == JDICT.names
+    assert dict(jobs.items()) == dict(JDICT.items())
+    assert loaded_PRED == {Ji: preds for Ji, preds in PRED.items() if preds}
+    # The columns are mapped from the file, and copied when the table is pickled
+    assert isinstance(jobs.r_min, memoryview)
+    assert dict(pickle.loads(pickle.dumps(jobs)).items()) == dict(JDICT.items())
+
+    logger = logging.Logger("SAGPY", logging.CRITICAL)
+    expected = ScheduleGraphConstructionAlgorithmROS(J, 2, JDICT, PRED, logger)
+    result = ScheduleGraphConstructionAlgorithmROS(
+        set(jobs.keys()), 2, jobs, loaded_PRED, logger
+    )
+    assert result[1:] == expected[1:]
+
+
+def test_truncated_job_file(tmp_path):
+    path = tmp_path / "jobs.sagjobs"
+    convert_csv(JOBS_PATH, str(path))
+    path.write_bytes(path.read_bytes()[:-1])
+
+    with pytest.raises(ValueError, match="truncated"):
+        load_job_file(str(path))
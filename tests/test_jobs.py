@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from sagpy.jobs import JobFeed, JobTable, PriorityIndex, split_busy_windows
+
+
+def test_priority_index_matches_direct_minimum():
+    """
+    t_high and the minimum R_max must equal the minimum over the higher-priority jobs,
+    also when jobs share predecessors.
+    """
+    rng = random.Random(0)
+    n = 30
+    p = list(range(n))
+    rng.shuffle(p)
+    preds = [frozenset(rng.sample(range(5), rng.randint(0, 2))) for z in range(n)]
+    r_max = [rng.randint(0, 50) for z in range(n)]
+    LFT = [rng.randint(0, 50) for z in range(n)]
+
+    def R_max(a):
+        return max(r_max[a], max([LFT[y] for y in preds[a]], default=0))
+
+    job_set = rng.sample(range(n), 20)
+    index = PriorityIndex(job_set, p, preds, R_max)
+
+    assert index.min_R_max(-1) == min(R_max(z) for z in job_set)
+    assert PriorityIndex([], p, preds, R_max).min_R_max(-1) == -1
+
+    for i in range(n):
+
+        def th(x):
+            return max(r_max[x], max([LFT[y] for y in preds[x] - preds[i]], default=0))
+
+        expected = min([th(z) for z in job_set if p[z] < p[i]], default=-1)
+        assert index.t_high(p[i], preds[i], th, -1) == expected
+
+
+def test_job_feed_keeps_release_order():
+    jobs = JobTable()
+    feed = JobFeed(jobs, [("J1", 0, 1, 1, 2, 10, 1), ("J2", 5, 5, 1, 2, 10, 2)])
+
+    assert feed.admit_until(4) == 0b1
+    assert feed.next_release == 5
+    assert feed.admit_until(4) == 0
+    assert feed.admit_until(5) == 0b10
+    assert feed.exhausted and jobs.names == ["J1", "J2"]
+
+    # Retired jobs leave the front of the table, the others move down
+    jobs.retire(1)
+    assert jobs.names == ["J2"] and jobs.index == {"J2": 0}
+    assert jobs.row(0) == {
+        "r_min": 5,
+        "r_max": 5,
+        "C_min": 1,
+        "C_max": 2,
+        "d": 10,
+        "p": 2,
+    }
+
+    feed = JobFeed(JobTable(), [("J1", 5, 5, 1, 2, 10, 1), ("J2", 0, 1, 1, 2, 10, 2)])
+    with pytest.raises(ValueError, match="not sorted"):
+        feed.admit_until(10)
+
+
+def test_split_busy_windows():
+    jobs = JobTable()
+    jobs.append("J1", 0, 2, 1, 3)  # Finishes by 5
+    jobs.append("J2", 5, 5, 1, 1)  # Starts a window, which J2 and J3 end by 7
+    jobs.append("J3", 5, 5, 1, 1)
+    jobs.append("J4", 6, 7, 1, 2)  # Can be released before J2 and J3 finish
+    jobs.append("J5", 20, 20, 1, 1)
+
+    no_preds = [frozenset()] * len(jobs)
+    assert split_busy_windows(jobs, no_preds) == [[0], [1, 2, 3], [4]]
+
+    # A window with precedence constraints is never ended, since a job that waits for
+    # its predecessors can leave cores idle
+    preds = no_preds[:4] + [frozenset([0])]
+    assert split_busy_windows(jobs, preds) == [[0, 1, 2, 3, 4]]
+    preds = no_preds[:3] + [frozenset([1]), frozenset()]
+    assert split_busy_windows(jobs, preds) == [[0], [1, 2, 3, 4]]
@@ -0,0 +1,35 @@
+import os
+import sys
+import subprocess
+
+import sagpy
+
+from sagpy.sag_algorithms import ALGORITHMS
+from sagpy.sag_algorithms.ros import ScheduleGraphConstructionAlgorithmROS
+
+
+def test_registry_lists_all_algorithms():
+    assert sorted(ALGORITHMS) == ["ecrts2019", "ros"]
+    assert ALGORITHMS["ros"] is ScheduleGraphConstructionAlgorithmROS
+    assert ALGORITHMS.get("missing") is None
+
+
+def test_cli_does_not_import_heavy_dependencies():
+    """
+    Loading the CLI must neither import the algorithms nor networkx, matplotlib or drawpyo.
+    """
+    code = (
+        "import sys, sagpy.sagpy\n"
+        "heavy = ['networkx', 'matplotlib', 'drawpyo', 'tqdm', 'sagpy.sag_algorithms.ros']\n"
+        "print(','.join(name for name in heavy if name in sys.modules))"
+    )
+    src_dir = os.path.dirname(os.path.dirname(sagpy.__file__))
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": src_dir},
+    )
+
+    assert result.stdout.strip() == ""
@@ -0,0 +1,385 @@
+import os
+import pytest
+import logging
+
+from sagpy.sag_algorithms.ecrts2019 import ScheduleGraphConstructionAlgorithm
+from sagpy.utils import *
+from sagpy.jobs import JobTable
+from sagpy.sag_template import DeadlineMiss
+from sagpy.frontier import FrontierExpander
+from sagpy.sag_graph import ScheduleGraph
+from sagpy.generate_jobs import release_ordered_jobs
+
+THIS_DIR = os.path.dirname(__file__)
+EXAMPLES_DIR = os.path.join(THIS_DIR, "..", "examples")
+LOGGER = logging.Logger("SAGPY", logging.CRITICAL)
+
+
+def get_inputs(jobs_path, pred_path=""):
+    JDICT = get_job_dict(jobs_path)
+    J = set(JDICT.keys())
+    PRED = {j: set() for j in J}
+
+    if pred_path != "":
+        PRED.update(get_pred(pred_path))
+
+    return J, JDICT, PRED
+
+
+def get_job_sets():
+    job_sets = list()
+
+    for folder in ["all_cases", "job_sets"]:
+        folder_path = os.path.join(EXAMPLES_DIR, folder)
+        for file in sorted(os.listdir(folder_path)):
+            job_sets.append(os.path.join(folder_path, file))
+
+    return job_sets
+
+
+@pytest.mark.parametrize("jobs_path", get_job_sets())
+@pytest.mark.parametrize("cores", [1, 2, 3])
+def test_merging_keeps_response_times(jobs_path, cores):
+    """
+    Merging states, or dropping the dominated ones, must not change the response time
+    bounds of the example job sets.
+    """
+    J, JDICT, PRED = get_inputs(jobs_path)
+    G1, BR1, WR1 = ScheduleGraphConstructionAlgorithm(
+        J, cores, JDICT, PRED, logger=LOGGER, merge=False
+    )
+    G2, BR2, WR2 = ScheduleGraphConstructionAlgorithm(
+        J, cores, JDICT, PRED, logger=LOGGER
+    )
+    G3, BR3, WR3 = ScheduleGraphConstructionAlgorithm(
+        J, cores, JDICT, PRED, logger=LOGGER, merge=False, prune_dominated=True
+    )
+
+    assert BR1 == BR2 == BR3
+    assert WR1 == WR2 == WR3
+    assert len(G2) <= len(G3) <= len(G1)
+
+
+def test_precedence_constraints():
+    """
+    Chain of jobs: J1_1 triggers J8_2 triggers J9_3
+    """
+    J, JDICT, PRED = get_inputs(
+        f"{EXAMPLES_DIR}/job_sets/basic_pred_constraints_setup.csv",
+        f"{EXAMPLES_DIR}/pred_sets/pred_constraints.csv",
+    )
+    G, BR, WR = ScheduleGraphConstructionAlgorithm(J, 2, JDICT, PRED, logger=LOGGER)
+
+    assert len(G) == 4
+    assert BR == {"J1_1": 5, "J8_2": 3, "J9_3": 3}
+    assert WR == {"J1_1": 5, "J8_2": 3, "J9_3": 3}
+
+
+@pytest.mark.parametrize("jobs_path", get_job_sets())
+def test_dropping_levels_keeps_response_times(jobs_path):
+    """
+    Exploring without keeping the graph must give the same response time bounds.
+    """
+    J, JDICT, PRED = get_inputs(jobs_path)
+    _, BR1, WR1 = ScheduleGraphConstructionAlgorithm(J, 2, JDICT, PRED, logger=LOGGER)
+    G2, BR2, WR2 = ScheduleGraphConstructionAlgorithm(
+        J, 2, JDICT, PRED, logger=LOGGER, keep_graph=False
+    )
+
+    assert G2 is None
+    assert BR1 == BR2
+    assert WR1 == WR2
+
+
+@pytest.mark.parametrize("jobs_path", get_job_sets())
+def test_job_table_input(jobs_path):
+    """
+    A JobTable can be passed instead of a dictionary of jobs.
+    """
+    J, JDICT, PRED = get_inputs(jobs_path)
+    _, BR1, WR1 = ScheduleGraphConstructionAlgorithm(J, 2, JDICT, PRED, logger=LOGGER)
+    _, BR2, WR2 = ScheduleGraphConstructionAlgorithm(
+        J, 2, JobTable.from_dict(JDICT), PRED, logger=LOGGER
+    )
+
+    assert BR1 == BR2
+    assert WR1 == WR2
+
+
+def test_stop_on_deadline_miss():
+    """
+    On one core, J1_1 (higher priority) runs first, so J2_1 finishes at 7 instead of 5.
+    """
+    jobs = JobTable()
+    jobs.append("J1_1", 0, 0, 3, 3, d=10, p=1)
+    jobs.append("J2_1", 0, 0, 4, 4, d=5, p=2)
+    J = set(jobs.keys())
+    PRED = {Ji: set() for Ji in J}
+
+    with pytest.raises(DeadlineMiss) as miss:
+        ScheduleGraphConstructionAlgorithm(
+            J, 1, jobs, PRED, logger=LOGGER, stop_on_deadline_miss=True
+        )
+
+    assert miss.value.job == "J2_1"
+    assert miss.value.path == ["J1_1", "J2_1"]
+    assert miss.value.lateness == 2
+    assert miss.value.WR == {"J1_1": 3, "J2_1": 7}
+
+
+@pytest.mark.parametrize("jobs_path", get_job_sets())
+def test_parallel_expansion(jobs_path, monkeypatch):
+    """
+    Expanding the levels on worker processes must give the same SAG and response times.
+    """
+    monkeypatch.setattr(FrontierExpander, "MIN_PARALLEL_STATES", 0)
+    J, JDICT, PRED = get_inputs(jobs_path)
+    G1, BR1, WR1 = ScheduleGraphConstructionAlgorithm(J, 2, JDICT, PRED, logger=LOGGER)
+    G2, BR2, WR2 = ScheduleGraphConstructionAlgorithm(
+        J, 2, JDICT, PRED, logger=LOGGER, workers=2
+    )
+
+    assert BR1 == BR2
+    assert WR1 == WR2
+    assert sorted(G1.edges(data="job")) == sorted(G2.edges(data="job"))
+
+
+def test_parallel_expansion_with_precedence_constraints(monkeypatch):
+    """
+    The workers only get BR/WR of the predecessors, which is all they read.
+    """
+    monkeypatch.setattr(FrontierExpander, "MIN_PARALLEL_STATES", 0)
+    J, JDICT, PRED = get_inputs(
+        f"{EXAMPLES_DIR}/job_sets/basic_pred_constraints_setup.csv",
+        f"{EXAMPLES_DIR}/pred_sets/pred_constraints.csv",
+    )
+    G, BR, WR = ScheduleGraphConstructionAlgorithm(
+        J, 2, JDICT, PRED, logger=LOGGER, workers=2
+    )
+
+    assert len(G) == 4
+    assert BR == {"J1_1": 5, "J8_2": 3, "J9_3": 3}
+    assert WR == {"J1_1": 5, "J8_2": 3, "J9_3": 3}
+
+
+@pytest.mark.parametrize("jobs_path", get_job_sets())
+@pytest.mark.parametrize("cores", [1, 2])
+def test_job_feed_keeps_response_times(jobs_path, cores):
+    """
+    Adding the jobs in release order during the exploration must give the same bounds.
+    """
+    J, JDICT, PRED = get_inputs(jobs_path)
+    G1, BR1, WR1 = ScheduleGraphConstructionAlgorithm(
+        J, cores, JDICT, PRED, logger=LOGGER
+    )
+
+    source = sorted(
+        [
+            (Ji, v["r_min"], v["r_max"], v["C_min"], v["C_max"], v["d"], v["p"])
+            for Ji, v in JobTable.from_dict(JDICT).items()
+        ],
+        key=lambda job: job[1],
+    )
+    G2, BR2, WR2 = ScheduleGraphConstructionAlgorithm(
+        set(), cores, JobTable(), dict(), logger=LOGGER, job_feed=source
+    )
+
+    assert BR1 == BR2
+    assert WR1 == WR2
+
+
+def test_job_feed_retires_dispatched_jobs(monkeypatch):
+    """
+    Without the graph, the jobs that every state has dispatched are retired from the
+    job table, and the response times and the deadline miss stay the same.
+    """
+    jobs = JobTable()
+    for k in range(20):
+        jobs.append(f"J1_{k + 1}", 5 * k, 5 * k + 1, 1, 2, 5 * k + 5, 1)
+        jobs.append(f"J2_{k + 1}", 5 * k, 5 * k + 2, 1, 2, 5 * k + 5, 2)
+    jobs.append("J3_1", 96, 96, 4, 4, 99, 3)
+    source = [
+        (Ji, v["r_min"], v["r_max"], v["C_min"], v["C_max"], v["d"], v["p"])
+        for Ji, v in jobs.items()
+    ]
+    retired = []
+    retire = JobTable.retire
+    monkeypatch.setattr(
+        JobTable,
+        "retire",
+        lambda table, count: retired.append(count) or retire(table, count),
+    )
+
+    def analyze(**options):
+        try:
+            return ScheduleGraphConstructionAlgorithm(
+                **options, logger=LOGGER, keep_graph=False, stop_on_deadline_miss=True
+            )
+        except DeadlineMiss as miss:
+            return miss.job, miss.path, miss.lateness, miss.BR, miss.WR
+
+    expected = analyze(J=set(jobs.keys()), m=1, JDICT=jobs, PRED=dict())
+    assert expected[0] == "J3_1" and expected[1][:2] == ["J1_1", "J2_1"]
+    assert retired == []
+    assert (
+        analyze(J=set(), m=1, JDICT=JobTable(), PRED=dict(), job_feed=source)
+        == expected
+    )
+    assert sum(retired) >= len(jobs) // 2
+
+
+def test_job_feed_without_precedence_constraints():
+    J, JDICT, PRED = get_inputs(
+        f"{EXAMPLES_DIR}/job_sets/basic_pred_constraints_setup.csv",
+        f"{EXAMPLES_DIR}/pred_sets/pred_constraints.csv",
+    )
+    with pytest.raises(ValueError, match="precedence"):
+        ScheduleGraphConstructionAlgorithm(
+            set(), 2, JobTable(), PRED, logger=LOGGER, job_feed=[]
+        )
+
+
+@pytest.mark.parametrize("cores", [1, 2])
+def test_busy_windows_keep_response_times(cores):
+    """
+    Periodic jobs with idle instants in between, analyzed as one SAG and per busy window.
+    """
+    JDICT = JobTable()
+    for k in range(8):
+        JDICT.append(f"J1_{k + 1}", 10 * k, 10 * k + 1, 1, 2, 10 * k + 10, 2 * k)
+        JDICT.append(f"J2_{k + 1}", 10 * k, 10 * k + 3, 2, 3, 10 * k + 10, 2 * k + 1)
+        if k % 2 == 1:
+            JDICT.append(
+                f"J3_{k // 2 + 1}", 10 * k - 8, 10 * k - 5, 3, 4, 10 * k + 10, 20
+            )
+    J = set(JDICT.keys())
+    PRED = {"J3_2": {"J1_4"}}
+
+    G, BR1, WR1 = ScheduleGraphConstructionAlgorithm(
+        J, cores, JDICT, PRED, logger=LOGGER, keep_graph=False
+    )
+    for workers in (1, 2):
+        G, BR2, WR2 = ScheduleGraphConstructionAlgorithm(
+            J,
+            cores,
+            JDICT,
+            PRED,
+            logger=LOGGER,
+            keep_graph=False,
+            busy_windows=True,
+            workers=workers,
+        )
+        assert G is None
+        assert BR1 == BR2
+        assert WR1 == WR2
+
+    with pytest.raises(ValueError, match="response times"):
+        ScheduleGraphConstructionAlgorithm(
+            J, cores, JDICT, PRED, logger=LOGGER, busy_windows=True
+        )
+
+    # J1_1 waits for J0_1, which can be released at 8, so both can run until 13,
+    # after J2_1 is released at 11
+    JDICT = JobTable()
+    JDICT.append("J0_1", 4, 8, 1, 1)
+    JDICT.append("J1_1", 3, 3, 3, 4)
+    JDICT.append("J2_1", 11, 12, 4, 6)
+    J = set(JDICT.keys())
+    PRED = {"J1_1": {"J0_1"}}
+
+    G, BR1, WR1 = ScheduleGraphConstructionAlgorithm(
+        J, cores, JDICT, PRED, logger=LOGGER, keep_graph=False
+    )
+    G, BR2, WR2 = ScheduleGraphConstructionAlgorithm(
+        J, cores, JDICT, PRED, logger=LOGGER, keep_graph=False, busy_windows=True
+    )
+    assert BR1 == BR2
+    assert WR1 == WR2
+
+
+@pytest.mark.parametrize("cores", [1, 2])
+def test_busy_windows_prune_dominated_states(cores, monkeypatch):
+    """
+    The windows are explored with the options of the whole job set, so dropping the
+    dominated states gives the bounds of merge=False from fewer states.
+    """
+    JDICT = JobTable()
+    for k in range(6):
+        JDICT.append(f"J1_{k + 1}", 10 * k, 10 * k + 1, 1, 2, 10 * k + 10, 3 * k)
+        JDICT.append(f"J2_{k + 1}", 10 * k, 10 * k + 2, 1, 2, 10 * k + 10, 3 * k + 1)
+        JDICT.append(
+            f"J3_{k + 1}", 10 * k + 1, 10 * k + 2, 1, 3, 10 * k + 10, 3 * k + 2
+        )
+    J = set(JDICT.keys())
+
+    add_node = ScheduleGraph.add_node
+    states = []
+
+    def counting_add_node(graph, state):
+        states.append(state)
+        return add_node(graph, state)
+
+    monkeypatch.setattr(ScheduleGraph, "add_node", counting_add_node)
+
+    results = dict()
+    for prune_dominated in (False, True):
+        states.clear()
+        _, BR, WR = ScheduleGraphConstructionAlgorithm(
+            J,
+            cores,
+            JDICT,
+            {},
+            logger=LOGGER,
+            keep_graph=False,
+            busy_windows=True,
+            merge=False,
+            prune_dominated=prune_dominated,
+        )
+        results[prune_dominated] = (BR, WR, len(states))
+
+    assert results[True][:2] == results[False][:2]
+    assert results[True][2] < results[False][2]
+
+
+@pytest.mark.parametrize("cores", [1, 2])
+def test_repeating_hyperperiods(tmp_path, cores):
+    """
+    Stopping when the schedule repeats must give the response times per task of a much
+    longer horizon.
+    """
+    tasks_path = tmp_path / "tasks.csv"
+    tasks_path.write_text(
+        "1,10,1,1,2\n2,20,2,2,6\n3,40,3,1,4\n4,40,0,1,2\n5,80,4,2,5\n"
+    )
+    H, N = 80, 8 + 4 + 2 + 2 + 1
+
+    def per_task(BR, WR):
+        bounds = dict()
+        for Ji in BR:
+            task = Ji.split("_")[0]
+            BR_task, WR_task = bounds.get(task, (BR[Ji], WR[Ji]))
+            bounds[task] = (min(BR_task, BR[Ji]), max(WR_task, WR[Ji]))
+        return bounds
+
+    def analyze(hyperperiods, **options):
+        return ScheduleGraphConstructionAlgorithm(
+            set(),
+            cores,
+            JobTable(),
+            dict(),
+            logger=LOGGER,
+            keep_graph=False,
+            job_feed=release_ordered_jobs(tasks_path, hyperperiods * H - 1, True),
+            **options,
+        )
+
+    G, BR1, WR1 = analyze(6)
+    G, BR2, WR2 = analyze(6, hyperperiod=(H, N))
+
+    assert len(BR2) < 3 * N
+    assert per_task(BR1, WR1) == per_task(BR2, WR2)
+
+    with pytest.raises(ValueError, match="job feed"):
+        ScheduleGraphConstructionAlgorithm(
+            set(), cores, JobTable(), dict(), logger=LOGGER, hyperperiod=(H, N)
+        )
@@ -0,0 +1,69 @@
+import pytest
+
+from sagpy.sag_graph import ScheduleGraph, add_or_prune_state
+from sagpy.sag_algorithms.ecrts2019 import State
+
+
+def test_redirected_edges_end_up_in_networkx_graph():
+    """
+    Edges into a removed (merged) node must point to the node that replaces it.
+    """
+    graph = ScheduleGraph()
+    p1 = graph.add_node("p1")
+    p2 = graph.add_node("p2")
+    a = graph.add_node("a")
+    b = graph.add_node("b")
+    graph.add_edge(p1, a, 0)
+    graph.add_edge(p2, b, 1)
+
+    graph.redirect_in_edges(b, a)
+    graph.remove_node(b)
+
+    assert (p1, p2, a, b) == (0, 1, 2, 3)
+    assert len(graph) == 3 and b not in graph
+    assert graph.in_degree[a] == 2
+
+    G = graph.to_networkx(["J1", "J2"])
+    assert dict(G.nodes(data="state")) == {p1: "p1", p2: "p2", a: "a"}
+    assert sorted(G.edges(data="job")) == [(p1, a, "J1"), (p2, a, "J2")]
+
+
+def test_without_edges_only_live_nodes_are_kept():
+    """
+    Without edges, removed nodes must not take any memory and there is no networkx graph.
+    """
+    graph = ScheduleGraph(keep_edges=False)
+    root = graph.add_node("root")
+    child = graph.add_node("child")
+    graph.add_edge(root, child, 0)
+    graph.remove_node(root)
+
+    assert graph.states == {child: "child"}
+    assert graph.in_degree == {child: 1}
+    assert len(graph.edge_child) == 0
+    with pytest.raises(ValueError):
+        graph.to_networkx()
+
+
+def test_dominated_states_are_pruned():
+    graph = ScheduleGraph()
+    parent = graph.add_node(State(((0, 0), (0, 0)), ()))
+    bucket = []
+
+    def add(A, LFT):
+        state = State(tuple(A), ((0, 2, LFT),), 0b11)
+        node_id = add_or_prune_state(graph, bucket, state)
+        graph.add_edge(parent, node_id, 0)
+        return node_id
+
+    small = add([(2, 3), (4, 5)], 3)
+    other = add([(1, 3), (6, 7)], 3)
+    # Dominated by the first state
+    assert add([(2, 3), (4, 4)], 3) == small
+    # Dominates both states, which it replaces
+    wide = add([(1, 4), (4, 8)], 4)
+
+    assert wide == other and small not in graph
+    assert graph.states[wide].A == ((1, 4), (4, 8))
+    assert graph.in_degree[wide] == 4
+    assert bucket == [(1, wide)]
@@ -5,6 +5,9 @@ import logging
 
 from sagpy.sag_algorithms.ros import ScheduleGraphConstructionAlgorithmROS
 from sagpy.utils import *
+from sagpy.jobs import JobTable
+from sagpy.sag_template import DeadlineMiss
+from sagpy.frontier import FrontierExpander
 
 from networkx.algorithms.isomorphism import DiGraphMatcher
 
@@ -133,3 +136,75 @@ def tests4():
         2,
         f"{THIS_DIR}/tests_sag_ros/test4/pred.csv",
     )
+
+
+@pytest.mark.parametrize("test", ["test1", "test2", "test3", "test4"])
+def tests_merging_keeps_response_times(test):
+    """
+    Merging states, or dropping the dominated ones, must not change the response time
+    bounds of the test job sets.
+    """
+    test_dir = f"{THIS_DIR}/tests_sag_ros/{test}"
+    pred_path = f"{test_dir}/pred.csv" if os.path.isfile(f"{test_dir}/pred.csv") else ""
+    inputs = get_inputs(f"{test_dir}/jobs.csv", 2, pred_path)
+    logger = logging.Logger("SAGPY", logging.CRITICAL)
+
+    _, BR1, WR1 = ScheduleGraphConstructionAlgorithmROS(
+        *inputs, logger=logger, merge=False
+    )
+    _, BR2, WR2 = ScheduleGraphConstructionAlgorithmROS(*inputs, logger=logger)
+    _, BR3, WR3 = ScheduleGraphConstructionAlgorithmROS(
+        *inputs, logger=logger, merge=False, prune_dominated=True
+    )
+
+    assert BR1 == BR2 == BR3
+    assert WR1 == WR2 == WR3
+
+
+def tests_stop_on_deadline_miss():
+    """
+    On one core, J1_1 (higher priority) runs first, so J2_1 finishes at 7 instead of 5.
+    """
+    jobs = JobTable()
+    jobs.append("J1_1", 0, 0, 3, 3, d=10, p=1)
+    jobs.append("J2_1", 0, 0, 4, 4, d=5, p=2)
+    J = set(jobs.keys())
+    PRED = {Ji: set() for Ji in J}
+    logger = logging.Logger("SAGPY", logging.CRITICAL)
+
+    with pytest.raises(DeadlineMiss) as miss:
+        ScheduleGraphConstructionAlgorithmROS(
+            J, 1, jobs, PRED, logger=logger, stop_on_deadline_miss=True
+        )
+
+    assert miss.value.job == "J2_1"
+    assert miss.value.path == ["J1_1", "J2_1"]
+    assert miss.value.lateness == 2
+
+    # Jobs read without deadlines can never be late
+    inputs = get_inputs(f"{THIS_DIR}/tests_sag_ros/test1/jobs.csv", 2)
+    _, BR1, WR1 = ScheduleGraphConstructionAlgorithmROS(*inputs, logger=logger)
+    _, BR2, WR2 = ScheduleGraphConstructionAlgorithmROS(
+        *inputs, logger=logger, stop_on_deadline_miss=True
+    )
+
+    assert BR1 == BR2
+    assert WR1 == WR2
+
+
+def tests_parallel_expansion(monkeypatch):
+    """
+    Expanding the levels on worker processes must give the same SAG.
+    """
+    monkeypatch.setattr(FrontierExpander, "MIN_PARALLEL_STATES", 0)
+    inputs = get_inputs(
+        f"{THIS_DIR}/tests_sag_ros/test4/jobs.csv",
+        2,
+        f"{THIS_DIR}/tests_sag_ros/test4/pred.csv",
+    )
+    G = ScheduleGraphConstructionAlgorithmROS(
+        *inputs, logger=logging.Logger("SAGPY", logging.CRITICAL), workers=2
+    )[0]
+    expected = get_output(f"{THIS_DIR}/tests_sag_ros/test4/sag.pkl")
+
+    assert DiGraphMatcher(G, expected, node_match, edge_match).is_isomorphic()
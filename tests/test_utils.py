@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+from sagpy.jobs import NO_DEADLINE
+from sagpy.utils import get_job_dict, get_pred, read_job_table, read_pred
+
+THIS_DIR = os.path.dirname(__file__)
+EXAMPLES_DIR = os.path.join(THIS_DIR, "..", "examples")
+HEADER = "Task ID,Job ID,Arrival min,Arrival max,Cost min,Cost max,Deadline,Priority\n"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 1 << 20])
+def test_read_job_table_without_header(chunk_size):
+    path = f"{EXAMPLES_DIR}/job_sets/overlapping_release_intervals.csv"
+    JDICT = get_job_dict(path)
+    jobs = read_job_table(path, chunk_size)
+
+    assert jobs.names == list(JDICT.keys())
+    for Ji, values in JDICT.items():
+        assert jobs[Ji] == {**values, "d": NO_DEADLINE}
+
+
+def test_read_job_table_with_header(tmp_path):
+    path = tmp_path / "jobs.csv"
+    path.write_text(HEADER + "1, 1, 0, 2, 1, 3, 10, 1\n\n2,2,5,5,2,2,20,2")
+    jobs = read_job_table(path)
+
+    assert jobs.names == ["J1_1", "J2_2"]
+    assert jobs["J2_2"] == {
+        "r_min": 5,
+        "r_max": 5,
+        "C_min": 2,
+        "C_max": 2,
+        "d": 20,
+        "p": 2,
+    }
+
+
+@pytest.mark.parametrize(
+    "content, error",
+    [
+        (
+            HEADER + "1,1,0,0,1,1,5,1\n1,2,0,0,1,1\n",
+            "Line 3 has 6 columns instead of 8",
+        ),
+        (HEADER + "1,1,0,0,1,1,5,1\n\n2,1,0,0,1,1,5,2\n", "Line 4 has the same job ID"),
+        (
+            HEADER + "1,1,0,0,1,1,5,1\nx,1,0,0,1,1,5,2\n",
+            "Line 3's values cannot be converted",
+        ),
+        (
+            "J1,0,0,1,1,1\nJ2,0,0,1,1,1\nJ3,0,x,1,1,2\n",
+            "Line 3's values cannot be converted",
+        ),
+        ("J1,0,0,1,1,1\nJ1,0,0,1,1,1\n", "Line 2 has the same job ID"),
+    ],
+)
+def test_read_job_table_reports_line(content, error, tmp_path):
+    path = tmp_path / "jobs.csv"
+    path.write_text(content)
+
+    for chunk_size in (1, 1 << 20):
+        with pytest.raises(ValueError, match=error):
+            read_job_table(path, chunk_size)
+
+
+def test_read_pred(tmp_path):
+    path = f"{EXAMPLES_DIR}/pred_sets/pred_constraints.csv"
+    assert read_pred(path) == get_pred(path)
+
+    path = tmp_path / "pred.csv"
+    path.write_text(
+        "Predecessor TID,Predecessor JID,Successor TID,Successor JID\n1,1,2,2\n3,3,2,2\n"
+    )
+    assert read_pred(path) == {"J2_2": {"J1_1", "J3_3"}}
+
+    path.write_text(
+        "Predecessor TID,Predecessor JID,Successor TID,Successor JID\n1,1,2\n"
+    )
+    with pytest.raises(ValueError, match="Line 2 has 3 columns instead of 4"):
+        read_pred(path)